@@ -1,12 +1,25 @@
 import sys
 from PyQt5.QtWidgets import (
     QApplication, QMainWindow, QWidget, QVBoxLayout, QLabel, QPushButton,
-    QTableWidget, QTableWidgetItem, QSpinBox, QFileDialog, QGridLayout, QMessageBox, QComboBox, QAction,
-    QInputDialog
+    QTableView, QSpinBox, QFileDialog, QGridLayout, QMessageBox, QComboBox, QAction,
+    QInputDialog, QDockWidget, QPlainTextEdit
 )
-from functions import read_file, convert_column, export_data
+from PyQt5.QtCore import Qt
+from PyQt5.QtGui import QFontDatabase
+from functions import load_macro, SPLIT_METHODS
+from history import ColumnHistory
+from table_model import DataFrameTableModel
+from workers import Worker, JobQueue
+from jobs import load_job, compact_load_job, convert_job, split_job, macro_job, export_job, auto_detect_job
+from inference import infer_column_type
+from instrumentation import tracer
+from workbook import sheet_names
 import json
 
+# File dialog filter for every format read_file and export_data support
+DATA_FILE_FILTER = ("CSV Files (*.csv *.csv.gz *.csv.zst);;Excel Files (*.xls *.xlsx);;Parquet Files (*.parquet);;"
+                    "Feather Files (*.feather *.arrow);;JSON Lines Files (*.jsonl *.jsonl.gz)")
+
 class DataMigrationApp(QMainWindow):
     def __init__(self):
         super().__init__()
@@ -17,6 +30,11 @@ class DataMigrationApp(QMainWindow):
         self.is_small = False  # Track if window is in small (50x50) mode
         self.recorded_actions = []  # Add this to store recorded actions
         self.is_recording = False   # Add this to track recording state
+        self.history = ColumnHistory()  # Column-level undo/redo history
+        self.jobs = JobQueue(self)  # Background queue for load, process and export
+        self.pending_change = None  # Worker of the job that will replace self.df (load, conversion, ...), if any
+        self.detected_format = None  # Datetime format detected for the selected column
+        self.sheet_name = None  # Sheet of the loaded workbook, None for the first sheet or other formats
         self.initUI()
 
     def initUI(self):
@@ -71,18 +89,22 @@ class DataMigrationApp(QMainWindow):
         # loaded_data_label = QLabel('Loaded data:')
         # loaded_data_layout.addWidget(loaded_data_label)
 
-        self.table_widget = QTableWidget()
-        self.table_widget.setSelectionBehavior(QTableWidget.SelectColumns)
-        self.table_widget.horizontalHeader().setStretchLastSection(True)
-        self.table_widget.itemSelectionChanged.connect(self.on_column_selected)
-        loaded_data_layout.addWidget(self.table_widget)
+        # Virtualized view: cells are formatted only when they are painted
+        self.table_model = DataFrameTableModel(row_limit=5)
+        self.table_view = QTableView()
+        self.table_view.setModel(self.table_model)
+        self.table_view.setSelectionBehavior(QTableView.SelectColumns)
+        self.table_view.horizontalHeader().setStretchLastSection(True)
+        self.table_view.selectionModel().selectionChanged.connect(self.on_column_selected)
+        loaded_data_layout.addWidget(self.table_view)
 
         # Dropdown for selecting number of rows to display
         self.row_selector = QSpinBox()
         self.row_selector.setMinimum(1)
+        self.row_selector.setMaximum(2147483647)
         self.row_selector.setValue(5)
         self.row_selector.setSuffix(" rows")
-        self.row_selector.valueChanged.connect(self.update_table)
+        self.row_selector.valueChanged.connect(self.table_model.set_row_limit)
         loaded_data_layout.addWidget(self.row_selector)
 
         # Add Loaded Data section to grid layout
@@ -95,6 +117,20 @@ class DataMigrationApp(QMainWindow):
         # Add the grid layout to the main layout
         main_layout.addLayout(grid_layout)
 
+        # Progress of background jobs is reported in the status bar
+        self.statusBar()
+
+        # --------------- Performance Panel (Dock, hidden until enabled) ---------------
+        self.performance_view = QPlainTextEdit()
+        self.performance_view.setReadOnly(True)
+        self.performance_view.setFont(QFontDatabase.systemFont(QFontDatabase.FixedFont))
+        self.performance_dock = QDockWidget('Performance', self)
+        self.performance_dock.setWidget(self.performance_view)
+        self.performance_dock.visibilityChanged.connect(self.on_performance_panel_visibility)
+        self.addDockWidget(Qt.BottomDockWidgetArea, self.performance_dock)
+        self.performance_dock.hide()
+        self.jobs.changed.connect(lambda pending: self.update_performance_panel() if pending == 0 else None)
+
     # --------------- Initialize Menu Bar ---------------
     def initMenuBar(self):
         menubar = self.menuBar()
@@ -103,9 +139,14 @@ class DataMigrationApp(QMainWindow):
         file_menu = menubar.addMenu('File')
 
         # Open Action
-        open_action = QAction('Open', self)
-        open_action.triggered.connect(self.open_file)
-        file_menu.addAction(open_action)
+        self.open_action = QAction('Open', self)
+        self.open_action.triggered.connect(self.open_file)
+        file_menu.addAction(self.open_action)
+
+        # Open Low Memory Action
+        self.open_compact_action = QAction('Open (Low Memory)', self)
+        self.open_compact_action.triggered.connect(self.open_file_compact)
+        file_menu.addAction(self.open_compact_action)
 
         # Save Action
         self.save_action = QAction('Save', self)
@@ -147,13 +188,35 @@ class DataMigrationApp(QMainWindow):
         layout_action.triggered.connect(self.switch_layout)
         view_menu.addAction(layout_action)
 
+        # Performance Panel Action, tracing only runs while the panel is shown
+        self.performance_action = QAction('Performance Panel', self, checkable=True)
+        self.performance_action.triggered.connect(lambda checked: self.performance_dock.setVisible(checked))
+        view_menu.addAction(self.performance_action)
+
         # --------------- Process Menu ---------------
         special_menu = menubar.addMenu('Process')
 
         # Process Action
-        process_action = QAction('Process', self)
-        process_action.triggered.connect(self.process_file)
-        special_menu.addAction(process_action)
+        self.process_action = QAction('Process', self)
+        self.process_action.triggered.connect(self.process_file)
+        special_menu.addAction(self.process_action)
+
+        # Split Column Action
+        self.split_action = QAction('Split Column...', self)
+        self.split_action.triggered.connect(self.split_selected_column)
+        special_menu.addAction(self.split_action)
+
+        # Auto Detect Types Action
+        self.auto_detect_action = QAction('Auto Detect Types', self)
+        self.auto_detect_action.triggered.connect(self.auto_detect_types)
+        special_menu.addAction(self.auto_detect_action)
+
+        # Cancel Action
+        self.cancel_action = QAction('Cancel Running Jobs', self)
+        self.cancel_action.triggered.connect(self.jobs.cancel_all)
+        self.cancel_action.setEnabled(False)  # Enabled while jobs are queued
+        self.jobs.changed.connect(lambda pending: self.cancel_action.setEnabled(pending > 0))
+        special_menu.addAction(self.cancel_action)
 
         # Add new Macro menu
         macro_menu = menubar.addMenu('Macro')
@@ -174,41 +237,73 @@ class DataMigrationApp(QMainWindow):
         self.run_recording_action.triggered.connect(self.load_and_run_recording)
         macro_menu.addAction(self.run_recording_action)
 
+    # --------------- Background Jobs ---------------
+    def run_job(self, job, *args, description='Working', on_finished=None, on_error=None, changes_data=False,
+                **kwargs):
+        """
+        Queues a job from jobs.py and reports its progress in the status bar.
+        A job that `changes_data` replaces self.df when it finishes, so the
+        actions that read or replace the data are disabled until then;
+        otherwise a queued job would work on the frame from before it.
+        """
+        worker = Worker(job, *args, description=description, **kwargs)
+        worker.signals.progress.connect(
+            lambda rows: self.statusBar().showMessage(f'{description}: {rows:,} rows'))
+        worker.signals.error.connect(on_error or self.show_error_message)
+        worker.signals.error.connect(lambda _: self.statusBar().showMessage(f'{description} failed', 5000))
+        worker.signals.cancelled.connect(lambda: self.statusBar().showMessage(f'{description} cancelled', 5000))
+        worker.signals.finished.connect(lambda _: self.statusBar().showMessage(f'{description} done', 5000))
+        if on_finished:
+            worker.signals.finished.connect(on_finished)
+        if changes_data:
+            # Connected after on_finished, so the actions come back once self.df is updated
+            self.pending_change = worker
+            for signal in (worker.signals.finished, worker.signals.error, worker.signals.cancelled):
+                signal.connect(lambda *_, worker=worker: self.on_change_done(worker))
+            self.update_action_states()
+        return self.jobs.submit(worker)
+
+    def on_change_done(self, worker):
+        if self.pending_change is worker:
+            self.pending_change = None
+            self.update_action_states()
+
     # --------------- Save and Save As Methods ---------------
     def save_file(self):
         if self.file_path:
-            export_data(self.df, self.file_path)
-            self.file_label.setText(f'Saved file to {self.file_path}')
-            self.add_to_history()  # After save, clear the redo stack
+            # A sheet is saved back into its workbook, the other sheets are kept
+            self.run_job(export_job, self.df, self.file_path, sheet_name=self.sheet_name, description='Saving',
+                         on_finished=lambda path: self.file_label.setText(f'Saved file to {path}'))
 
     def save_file_as(self):
-        output_path, _ = QFileDialog.getSaveFileName(self, "Save As", "", "CSV Files (*.csv);;Excel Files (*.xls *.xlsx)")
+        output_path, _ = QFileDialog.getSaveFileName(self, "Save As", "", DATA_FILE_FILTER)
         if output_path:
-            export_data(self.df, output_path)
-            self.file_path = output_path
-            self.file_label.setText(f'Saved file to {output_path}')
-            self.add_to_history()  # After save, clear the redo stack
-
-    # --------------- Undo and Redo Methods with Stack ---------------
-    def add_to_history(self):
-        """Adds the current state to the undo history."""
-        self.undo_stack.append(self.df.copy())  # Save a copy of the current DataFrame
-        self.redo_stack.clear()  # Clear redo stack whenever a new change is made
+            self.run_job(export_job, self.df, output_path, description='Saving',
+                         on_finished=self.on_saved_as)
+
+    def on_saved_as(self, output_path):
+        self.file_path = output_path
+        self.sheet_name = None
+        self.file_label.setText(f'Saved file to {output_path}')
+        self.update_action_states()
+
+    # --------------- Undo and Redo Methods with Column History ---------------
+    def add_to_history(self, columns):
+        """Records the current state of the columns that are about to change."""
+        self.history.record(self.df, columns)  # Only the touched columns are kept
         self.update_action_states()
 
     def undo_change(self):
-        """Undo the last change by restoring from the undo stack."""
-        if self.undo_stack:
-            self.redo_stack.append(self.df.copy())  # Move current state to redo stack
-            self.df = self.undo_stack.pop()  # Revert to last state in undo stack
+        """Undo the last change by restoring the columns it replaced."""
+        if self.history.can_undo:
+            self.df = self.history.undo(self.df)  # Revert the changed columns
             self.update_table()  # Update the table with the reverted data
             self.update_action_states()
 
     def redo_change(self):
-        """Redo the last undone change by restoring from the redo stack."""
-        if self.redo_stack:
-            self.undo_stack.append(self.df.copy())  # Move current state to undo stack
-            self.df = self.redo_stack.pop()  # Restore the next state from redo stack
+        """Redo the last undone change by restoring the columns it reverted."""
+        if self.history.can_redo:
+            self.df = self.history.redo(self.df)  # Reapply the changed columns
             self.update_table()  # Update the table with the redone data
             self.update_action_states()
 
@@ -247,45 +342,64 @@ class DataMigrationApp(QMainWindow):
         file_path, _ = QFileDialog.getOpenFileName(
             self, "Load Recording", "", "JSON Files (*.json)")
         if file_path:
-            with open(file_path, 'r') as f:
-                actions = json.load(f)
-            
+            try:
+                actions = load_macro(file_path)
+            except Exception as e:
+                self.show_error_message(str(e))
+                return
+
             # Ask for the file to apply the recording to
             data_file, _ = QFileDialog.getOpenFileName(
-                self, "Select File to Process", "", "All Files (*);;CSV Files (*.csv);;Excel Files (*.xls *.xlsx)")
+                self, "Select File to Process", "", "All Files (*);;" + DATA_FILE_FILTER)
             if data_file:
                 self.replay_actions(actions, data_file)
 
     def replay_actions(self, actions, file_path):
-        try:
-            self.df = read_file(file_path)
-            for action in actions:
-                if action['action_type'] == 'convert_column':
-                    params = action['params']
-                    self.df = convert_column(
-                        self.df,
-                        params['column_name'],
-                        params['target_type'],
-                        params.get('format_spec')
-                    )
-            
-            # Ask where to save the processed file
-            output_path, _ = QFileDialog.getSaveFileName(
-                self, "Save Processed File", "", "CSV Files (*.csv);;Excel Files (*.xls *.xlsx)")
-            if output_path:
-                export_data(self.df, output_path)
-                QMessageBox.information(self, 'Success', 'Recording applied and file saved successfully!')
-                self.update_table()
-        except Exception as e:
-            self.show_error_message(f"Error applying recording: {str(e)}")
+        self.run_job(macro_job, file_path, actions, description='Applying recording', changes_data=True,
+                     on_finished=self.on_actions_replayed,
+                     on_error=lambda message: self.show_error_message(f"Error applying recording: {message}"))
+
+    def on_actions_replayed(self, df):
+        self.df = df
+        self.history.clear()
+        self.update_table()
+        self.update_action_states()
+
+        # Ask where to save the processed file
+        output_path, _ = QFileDialog.getSaveFileName(
+            self, "Save Processed File", "", DATA_FILE_FILTER)
+        if output_path:
+            self.run_job(export_job, self.df, output_path, description='Saving', on_finished=lambda _: QMessageBox.information(
+                self, 'Success', 'Recording applied and file saved successfully!'))
 
     # --------------- Update Action States ---------------
     def update_action_states(self):
         """Enable or disable actions based on the application state."""
-        self.save_action.setEnabled(bool(self.file_path))  # Enable save if a file is loaded
-        self.save_as_action.setEnabled(bool(self.df is not None))  # Enable save as if data is loaded
-        self.undo_action.setEnabled(bool(self.undo_stack))  # Enable undo if there are changes to undo
-        self.redo_action.setEnabled(bool(self.redo_stack))  # Enable redo if there are changes to redo
+        idle = self.pending_change is None  # Nothing queued that will replace the data
+        self.save_action.setEnabled(idle and bool(self.file_path))  # Enable save if a file is loaded
+        self.save_as_action.setEnabled(idle and self.df is not None)  # Enable save as if data is loaded
+        self.undo_action.setEnabled(idle and self.history.can_undo)  # Enable undo if there are changes to undo
+        self.redo_action.setEnabled(idle and self.history.can_redo)  # Enable redo if there are changes to redo
+        for action in (self.open_action, self.open_compact_action, self.process_action, self.split_action,
+                       self.auto_detect_action, self.run_recording_action):
+            action.setEnabled(idle)
+
+    # --------------- Performance Panel ---------------
+    def on_performance_panel_visibility(self, visible):
+        self.performance_action.setChecked(visible)
+        if visible:
+            tracer.enable()
+            self.update_performance_panel()
+        else:
+            tracer.disable()
+
+    def update_performance_panel(self):
+        """Shows the time, throughput and memory of the stages traced so far."""
+        if self.performance_dock.isVisible():
+            if tracer.events:
+                self.performance_view.setPlainText(tracer.format_summary())
+            else:
+                self.performance_view.setPlainText('No stages traced yet, run a load, conversion or save.')
 
     # --------------- Full Screen Toggle ---------------
     def toggle_full_screen(self):
@@ -308,34 +422,66 @@ class DataMigrationApp(QMainWindow):
     # --------------- Load file function ---------------
     def open_file(self):
         options = QFileDialog.Options()
-        file_path, _ = QFileDialog.getOpenFileName(self, "Select File", "", "All Files (*);;CSV Files (*.csv);;Excel Files (*.xls *.xlsx)", options=options)
+        file_path, _ = QFileDialog.getOpenFileName(self, "Select File", "", "All Files (*);;" + DATA_FILE_FILTER, options=options)
+        if file_path:
+            try:
+                sheet_name = self.ask_sheet(file_path)
+            except Exception as e:
+                self.show_error_message(str(e))
+                return
+            if sheet_name is False:
+                return
+            self.file_label.setText(f'Loading File: {file_path}')
+            self.run_job(load_job, file_path, sheet_name=sheet_name, description='Loading', changes_data=True,
+                         on_finished=lambda df: self.on_file_loaded(file_path, df, sheet_name))
+
+    def ask_sheet(self, file_path):
+        """
+        Asks which sheet to open when a workbook has several. Returns the
+        sheet name, None for single-sheet workbooks and other formats, and
+        False when cancelled.
+        """
+        if not file_path.lower().endswith(('.xls', '.xlsx')):
+            return None
+        names = sheet_names(file_path)
+        if len(names) < 2:
+            return None
+        sheet, ok = QInputDialog.getItem(self, 'Open Sheet', 'Sheet:', names, 0, False)
+        if not ok:
+            return False
+        return sheet
+
+    def open_file_compact(self):
+        file_path, _ = QFileDialog.getOpenFileName(self, "Select File", "", "All Files (*);;" + DATA_FILE_FILTER)
         if file_path:
-            self.file_label.setText(f'Selected File: {file_path}')
-            self.file_path = file_path
-            self.df = read_file(file_path)
-            self.update_table()
+            self.file_label.setText(f'Loading File: {file_path}')
+            self.run_job(compact_load_job, file_path, description='Loading', changes_data=True,
+                         on_finished=lambda result: self.on_file_loaded_compact(file_path, *result))
+
+    def on_file_loaded_compact(self, file_path, df, report):
+        self.on_file_loaded(file_path, df)
+        self.statusBar().showMessage(
+            f"Loaded in {report['after_bytes'] / 2**20:,.1f} MiB, saved {report['saved_bytes'] / 2**20:,.1f} MiB", 10000)
+
+    def on_file_loaded(self, file_path, df, sheet_name=None):
+        self.file_label.setText(f'Selected File: {file_path}' + (f' [{sheet_name}]' if sheet_name else ''))
+        self.file_path = file_path
+        self.sheet_name = sheet_name
+        self.df = df
+        self.history.clear()  # History belongs to the previous file
+        self.update_table()
+        self.update_action_states()
 
     # --------------- Update Table and Column Data Types ---------------
     def update_table(self):
         if self.df is not None:
-            num_rows = self.row_selector.value()
-            self.table_widget.setRowCount(num_rows)
-            self.table_widget.setColumnCount(len(self.df.columns))
-            self.table_widget.setHorizontalHeaderLabels(self.df.columns)
-
-            for i in range(num_rows):
-                if i < len(self.df):
-                    for j, col in enumerate(self.df.columns):
-                        self.table_widget.setItem(i, j, QTableWidgetItem(str(self.df.iloc[i, j])))
-                else:
-                    for j in range(len(self.df.columns)):
-                        self.table_widget.setItem(i, j, QTableWidgetItem(''))
+            self.table_model.set_dataframe(self.df)
 
     # --------------- Column Selection Event Handler ---------------
     def on_column_selected(self):
-        selected_ranges = self.table_widget.selectedRanges()
-        if selected_ranges:
-            selected_column = selected_ranges[0].leftColumn()
+        selected_indexes = self.table_view.selectionModel().selectedIndexes()
+        if selected_indexes:
+            selected_column = selected_indexes[0].column()
             column_name = self.df.columns[selected_column]
             self.selected_column = column_name
             self.selected_column_display.setText(column_name)
@@ -350,47 +496,125 @@ class DataMigrationApp(QMainWindow):
             self.type_display.setText(str(column_dtype))
             self.format_selector.clear()
             if column_dtype in ['int64', 'float64']:
-                self.format_selector.addItems(['int', 'decimal', 'string'])
-            elif column_dtype == 'object':
-                self.format_selector.addItems(['string', 'category', 'bool'])
+                options = ['int', 'decimal', 'string']
+            elif str(column_dtype) in ['object', 'str', 'string']:
+                options = ['string', 'category', 'bool']
             elif 'datetime' in str(column_dtype):
-                self.format_selector.addItems(['datetime', 'string', 'unix'])
+                options = ['datetime', 'string', 'unix', 'date', 'time']
             elif column_dtype == 'bool':
-                self.format_selector.addItems(['bool', 'int', 'string'])
+                options = ['bool', 'int', 'string']
             else:
-                self.format_selector.addItems(['string', 'object'])
+                options = ['string', 'object']
+
+            # Offer the type detected from a sample of the column first
+            detected_type, self.detected_format = infer_column_type(self.df[column_name])
+            if detected_type in options:
+                options.remove(detected_type)
+            self.format_selector.addItems([detected_type] + options)
 
     # --------------- Process File and Column Transformation ---------------
     def process_file(self):
         try:
+            if self.pending_change is not None:
+                raise ValueError('Please wait until the current job has finished!')
             if self.file_path and self.selected_column:
-                df = read_file(self.file_path)
                 column_name = self.selected_column
                 target_type = self.format_selector.currentText()
-
-                try:
-                    self.df = convert_column(df, column_name, target_type, None)
-                    # Record the action
-                    self.record_action_step('convert_column', 
-                        column_name=column_name,
-                        target_type=target_type,
-                        format_spec=None
-                    )
-                except Exception as e:
-                    self.show_error_message(str(e))
-                    return
-                
-                self.update_table()
-                output_path, _ = QFileDialog.getSaveFileName(self, "Save File", "", "CSV Files (*.csv);;Excel Files (*.xls *.xlsx)")
-                if output_path:
-                    export_data(self.df, output_path)
-                    self.file_label.setText(f'Saved processed file to {output_path}')
+                format_spec = self.detected_format if target_type in ('datetime', 'date', 'time') else None
+                # Converts the loaded data, so earlier conversions are kept and nothing is re-read
+                self.run_job(convert_job, self.df, column_name, target_type, format_spec, description='Processing',
+                             changes_data=True,
+                             on_finished=lambda df: self.on_column_converted(df, column_name, target_type, format_spec))
             else:
                 raise ValueError('No file or column selected!')
 
         except Exception as e:
             self.show_error_message(str(e))
 
+    def on_column_converted(self, df, column_name, target_type, format_spec=None):
+        self.add_to_history([column_name])  # Only record conversions that succeeded
+        self.df = df
+        # Record the action
+        self.record_action_step('convert_column',
+            column_name=column_name,
+            target_type=target_type,
+            format_spec=format_spec
+        )
+        self.update_table()
+
+        output_path, _ = QFileDialog.getSaveFileName(self, "Save File", "", DATA_FILE_FILTER)
+        if output_path:
+            self.run_job(export_job, self.df, output_path, description='Saving', on_finished=lambda path: self.file_label.setText(
+                f'Saved processed file to {path}'))
+
+    # --------------- Split Columns ---------------
+    def split_selected_column(self):
+        if self.df is None or self.pending_change is not None or not self.selected_column:
+            self.show_error_message('Please load a file and select a column first!')
+            return
+        column_name = self.selected_column
+        method, ok = QInputDialog.getItem(self, 'Split Column', f"Split '{column_name}' by:", SPLIT_METHODS, 0, False)
+        if not ok:
+            return
+        params = self.ask_split_params(method)
+        if params is None:
+            return
+        self.run_job(split_job, self.df, column_name, method, params, description='Splitting', changes_data=True,
+                     on_finished=lambda result: self.on_column_split(result, column_name, method, params))
+
+    def ask_split_params(self, method):
+        """Asks for the parameters of a split method. Returns None when cancelled."""
+        if method == 'delimiter':
+            delimiter, ok = QInputDialog.getText(self, 'Split Column', 'Delimiter:', text='-')
+            return {'delimiter': delimiter} if ok else None
+        if method == 'fixed_width':
+            widths, ok = QInputDialog.getText(self, 'Split Column', 'Field widths (e.g. 3,2,4):')
+            if not ok:
+                return None
+            try:
+                return {'widths': [int(width) for width in widths.split(',')]}
+            except ValueError:
+                self.show_error_message(f'Invalid field widths: {widths}')
+                return None
+        if method == 'regex':
+            pattern, ok = QInputDialog.getText(self, 'Split Column', 'Pattern with capture groups:')
+            return {'pattern': pattern} if ok else None
+        parts, ok = QInputDialog.getText(self, 'Split Column', 'Parts (date, time, year, month, day, ...):',
+                                         text='date,time')
+        if not ok:
+            return None
+        return {'parts': [part.strip() for part in parts.split(',') if part.strip()], 'format': self.detected_format}
+
+    def on_column_split(self, result, column_name, method, params):
+        df, new_columns = result
+        self.add_to_history(new_columns)  # New columns are recorded as absent, so undo removes them
+        self.df = df
+        self.record_action_step('split_column', column_name=column_name, method=method, **params)
+        self.update_table()
+        self.statusBar().showMessage(f"Split '{column_name}' into {', '.join(map(str, new_columns))}", 5000)
+
+    # --------------- Automatic Type Detection ---------------
+    def auto_detect_types(self):
+        if self.df is None or self.pending_change is not None:
+            self.show_error_message('Please load a file first!')
+            return
+        self.run_job(auto_detect_job, self.df, description='Detecting types', changes_data=True,
+                     on_finished=self.on_types_detected)
+
+    def on_types_detected(self, result):
+        df, transformations = result
+        if transformations:
+            self.add_to_history([transformation['column'] for transformation in transformations])
+        self.df = df
+        for transformation in transformations:
+            self.record_action_step('convert_column',
+                column_name=transformation['column'],
+                target_type=transformation['type'],
+                format_spec=transformation['format']
+            )
+        self.update_table()
+        self.statusBar().showMessage(f'Converted {len(transformations)} columns to their detected types', 5000)
+
     # --------------- Error Message Popup ---------------
     def show_error_message(self, message):
         error_dialog = QMessageBox()
@@ -0,0 +1,261 @@
+"""
+Benchmarks for the migration core in functions.py.
+
+Generates a synthetic dataset, then times read_file and export_data per
+file format, convert_column for every target type and apply_transformations
+for the whole table. Each conversion gets a fresh copy of its input, made
+outside the timer. Conversions use the 'coerce' error policy, so a --dirty
+dataset times the conversion itself rather than an early failure.
+Throughput and peak memory are written to a JSON file, which a later run
+can use as its baseline to flag regressions.
+
+Examples:
+    python benchmark.py --rows 200000 --save baseline.json
+    python benchmark.py --rows 200000 --baseline baseline.json --tolerance 0.25
+"""
+import argparse
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+from functions import read_file, convert_column, apply_transformations, export_data
+from instrumentation import peak_rss
+from validation import ValidationReport
+
+DEFAULT_ROWS = 100000
+DEFAULT_MIX = 'int=2,decimal=2,bool=1,datetime=2,category=2,string=1'
+DEFAULT_FORMATS = 'csv,csv.gz,parquet,feather,jsonl,xlsx'
+
+# Target types each generated column kind is converted to, with their
+# format; the first one is used for apply_transformations. Together they
+# cover every type convert_column supports (SUPPORTED_TYPES).
+CONVERSIONS = {
+    'int': [('int', None)],
+    'decimal': [('decimal', None)],
+    'bool': [('bool', None)],
+    'datetime': [('datetime', '%Y-%m-%d %H:%M:%S'), ('date', '%Y-%m-%d %H:%M:%S'), ('time', '%Y-%m-%d %H:%M:%S'),
+                 ('unix', None)],
+    'category': [('category', None)],
+    'string': [('binary', None), ('string', None), ('object', None)],
+}
+
+# --------------- Synthetic Data ---------------
+def _generate_values(kind, rows, rng):
+    """Returns `rows` text values of the given kind, as read from a raw extract."""
+    if kind == 'int':
+        return rng.integers(-10**6, 10**6, rows).astype(str)
+    if kind == 'decimal':
+        return np.char.mod('%.2f', rng.random(rows) * 10**4)
+    if kind == 'bool':
+        return rng.choice(np.array(['yes', 'no', 'True', 'False']), rows)
+    if kind == 'datetime':
+        seconds = rng.integers(0, 10 * 365 * 86400, rows)
+        return (pd.Timestamp('2015-01-01') + pd.to_timedelta(seconds, unit='s')).strftime('%Y-%m-%d %H:%M:%S').to_numpy()
+    if kind == 'category':
+        levels = np.array([f'REGION-{index:02d}' for index in range(20)])
+        return rng.choice(levels, rows)
+    if kind == 'string':
+        return np.char.add('item-', rng.integers(0, 10**9, rows).astype(str))
+    raise ValueError(f"Unknown column kind: {kind}")
+
+def generate_dataset(rows=DEFAULT_ROWS, mix=DEFAULT_MIX, dirty=0.0, seed=0):
+    """
+    Builds a DataFrame with the requested number of rows and a column mix
+    such as 'int=2,datetime=1'. A `dirty` share of the cells in every column
+    is replaced with values that can't be converted.
+    Returns the DataFrame and its {column: kind} mapping.
+    """
+    rng = np.random.default_rng(seed)
+    data, kinds = {}, {}
+    for kind, count in parse_mix(mix).items():
+        for index in range(count):
+            column = f'{kind}_{index}'
+            values = _generate_values(kind, rows, rng).astype(object)
+            if dirty:
+                values[rng.random(rows) < dirty] = rng.choice(['N/A', '#REF!', '?', ''])
+            data[column] = values
+            kinds[column] = kind
+    return pd.DataFrame(data), kinds
+
+def parse_mix(mix):
+    """Parses 'kind=count,...' into a dict."""
+    counts = {}
+    for part in filter(None, mix.split(',')):
+        kind, _, count = part.partition('=')
+        if kind not in CONVERSIONS:
+            raise ValueError(f"Unknown column kind: {kind}")
+        counts[kind] = int(count or 1)
+    return counts
+
+# --------------- Measurement ---------------
+def _call(function, data, setup):
+    return function(data) if setup else function()
+
+def peak_memory(function, setup=None):
+    """
+    Runs `function` once in a forked child process and returns how far the
+    child's peak RSS grew while it ran. Unlike tracemalloc this counts
+    native allocations too (Arrow, compression, Excel writers). The child
+    shares the parent's pages and runs `setup` before measuring, so neither
+    the dataset nor the input copy is counted. Returns None where fork or
+    getrusage is unavailable (Windows).
+    """
+    if not hasattr(os, 'fork') or peak_rss() is None:
+        return None
+    read_end, write_end = os.pipe()
+    pid = os.fork()
+    if pid == 0:
+        try:
+            os.close(read_end)
+            data = setup() if setup else None
+            start = peak_rss()  # A new process starts its peak at its current RSS
+            try:
+                _call(function, data, setup)
+            except Exception:
+                pass
+            os.write(write_end, str(peak_rss() - start).encode())
+        finally:
+            os._exit(0)
+    os.close(write_end)
+    with os.fdopen(read_end) as f:
+        output = f.read()
+    os.waitpid(pid, 0)
+    return int(output) if output else None
+
+def measure(function, rows, repeat=3, setup=None):
+    """
+    Runs `function` `repeat` times and returns its best wall time, rows per
+    second and peak memory. With `setup`, each run calls `function` with a
+    fresh result of `setup()`, made before the timer starts (e.g. a copy
+    the function may change). Memory is measured in one extra run in a
+    child process (see peak_memory).
+    """
+    timings = []
+    error = None
+    for _ in range(repeat):
+        data = setup() if setup else None
+        start = time.perf_counter()
+        try:
+            _call(function, data, setup)
+        except Exception as e:
+            error = str(e)
+        timings.append(time.perf_counter() - start)
+    seconds = min(timings)
+    result = {
+        'seconds': seconds,
+        'rows_per_second': rows / seconds if seconds else 0.0,
+        'peak_bytes': peak_memory(function, setup),
+    }
+    if error:
+        result['error'] = error
+    return result
+
+def run_benchmarks(df, kinds, formats, repeat=3, workdir=None):
+    """Times every benchmark against the dataset. Returns {name: result}."""
+    rows = len(df)
+    results = {}
+    transformations = [{'column': column, 'type': CONVERSIONS[kind][0][0], 'format': CONVERSIONS[kind][0][1]}
+                       for column, kind in kinds.items()]
+
+    for column, kind in kinds.items():
+        for target_type, format in CONVERSIONS[kind]:
+            name = f'convert_column[{kind}->{target_type}]'
+            if name not in results:
+                results[name] = measure(
+                    lambda data: convert_column(data, column, target_type, format, ValidationReport('coerce')),
+                    rows, repeat, setup=lambda: df[[column]].copy())
+    results['apply_transformations'] = measure(
+        lambda data: apply_transformations(data, transformations, ValidationReport('coerce')),
+        rows, repeat, setup=df.copy)
+
+    with tempfile.TemporaryDirectory(dir=workdir) as directory:
+        for format in formats:
+            path = os.path.join(directory, f'data.{format}')
+            write = measure(lambda: export_data(df, path), rows, repeat)
+            if 'error' in write:
+                results[f'export_data[{format}]'] = results[f'read_file[{format}]'] = {'skipped': write['error']}
+                continue
+            results[f'export_data[{format}]'] = write
+            results[f'read_file[{format}]'] = measure(lambda: read_file(path, use_cache=False), rows, repeat)
+    return results
+
+# --------------- Baselines ---------------
+def compare(results, baseline, tolerance):
+    """
+    Returns the benchmarks that are slower or use more memory than the
+    baseline by more than `tolerance` (e.g. 0.2 for 20%).
+    """
+    regressions = []
+    for name, result in results.items():
+        previous = baseline.get('results', {}).get(name)
+        if not previous or 'seconds' not in result or 'seconds' not in previous:
+            continue
+        for metric in ('seconds', 'peak_bytes'):
+            if previous.get(metric) and result.get(metric) and result[metric] > previous[metric] * (1 + tolerance):
+                regressions.append({
+                    'benchmark': name,
+                    'metric': metric,
+                    'baseline': previous[metric],
+                    'current': result[metric],
+                    'change': result[metric] / previous[metric] - 1,
+                })
+    return regressions
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmark the FastMig conversion and I/O paths.')
+    parser.add_argument('--rows', type=int, default=DEFAULT_ROWS, help='rows in the synthetic dataset')
+    parser.add_argument('--mix', default=DEFAULT_MIX, help='column kinds and counts, e.g. int=2,datetime=1')
+    parser.add_argument('--dirty', type=float, default=0.0, help='share of unconvertible values per column')
+    parser.add_argument('--formats', default=DEFAULT_FORMATS, help='comma separated file formats to time')
+    parser.add_argument('--repeat', type=int, default=3, help='runs per benchmark, the best one counts')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--save', help='write the results to this JSON file')
+    parser.add_argument('--baseline', help='compare against results saved by an earlier run')
+    parser.add_argument('--tolerance', type=float, default=0.2, help='allowed slowdown before flagging, 0.2 = 20%%')
+    args = parser.parse_args(argv)
+
+    df, kinds = generate_dataset(args.rows, args.mix, args.dirty, args.seed)
+    report = {
+        'dataset': {'rows': args.rows, 'mix': args.mix, 'dirty': args.dirty, 'seed': args.seed},
+        'environment': {
+            'python': platform.python_version(),
+            'pandas': pd.__version__,
+            'numpy': np.__version__,
+            'machine': platform.machine(),
+        },
+        'results': run_benchmarks(df, kinds, [f for f in args.formats.split(',') if f], args.repeat),
+    }
+
+    for name, result in report['results'].items():
+        if 'skipped' in result:
+            print(f"{name:45} skipped: {result['skipped']}")
+        else:
+            status = f"  (failed: {result['error']})" if 'error' in result else ''
+            memory = f"{result['peak_bytes'] / 2**20:9.1f} MiB" if result['peak_bytes'] is not None else '        - MiB'
+            print(f"{name:45} {result['seconds']:9.4f}s {result['rows_per_second']:14,.0f} rows/s {memory}{status}")
+
+    exit_code = 0
+    if args.baseline:
+        with open(args.baseline, 'r') as f:
+            baseline = json.load(f)
+        if baseline.get('dataset') != report['dataset']:
+            print(f"warning: baseline was generated with {baseline.get('dataset')}, timings may not be comparable")
+        regressions = compare(report['results'], baseline, args.tolerance)
+        report['regressions'] = regressions
+        for regression in regressions:
+            print(f"REGRESSION {regression['benchmark']} {regression['metric']}: "
+                  f"{regression['baseline']:.4g} -> {regression['current']:.4g} ({regression['change']:+.0%})")
+        exit_code = 1 if regressions else 0
+    if args.save:
+        with open(args.save, 'w') as f:
+            json.dump(report, f, indent=2)
+    return exit_code
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,157 @@
+import glob
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from functools import partial
+
+from functions import export_data, load_macro, file_format, COMPRESSIONS
+from compiler import plan_for_file
+from instrumentation import tracer
+from incremental import migrate_incremental
+from validation import ValidationReport
+
+def is_supported(file_path):
+    """Returns True if read_file can read the file, judging by its extension."""
+    try:
+        file_format(file_path)
+    except ValueError:
+        return False
+    return True
+
+def collect_inputs(source):
+    """
+    Expands a directory, glob pattern or single file path (or a list of
+    them) into a sorted list of input files.
+
+    Raises:
+        FileNotFoundError: If nothing matches the source.
+    """
+    sources = [source] if isinstance(source, str) else list(source)
+    paths = set()
+    for entry in sources:
+        if os.path.isdir(entry):
+            paths.update(os.path.join(entry, name) for name in os.listdir(entry) if is_supported(name))
+        else:
+            paths.update(glob.glob(entry))
+    paths = sorted(path for path in paths if os.path.isfile(path))
+    if not paths:
+        raise FileNotFoundError(f"No input files found for: {', '.join(sources)}")
+    return paths
+
+def output_path_for(input_path, output_dir, output_format=None):
+    """
+    Builds the output path for an input file. The file keeps its name and,
+    unless `output_format` (e.g. 'csv') is given, its extension.
+    """
+    name = os.path.basename(input_path)
+    if output_format:
+        name = f"{os.path.splitext(name)[0]}.{output_format.lstrip('.')}"
+    return os.path.join(output_dir, name)
+
+def quarantine_path_for(output_path):
+    """Builds the path that receives the quarantined rows of an output, e.g. out.quarantine.csv.gz."""
+    root, extension = os.path.splitext(output_path)
+    if extension.lower() in COMPRESSIONS:
+        root, format_extension = os.path.splitext(root)
+        extension = format_extension + extension
+    return f"{root}.quarantine{extension}"
+
+def migrate_file(input_path, output_path, actions, on_error='fail'):
+    """
+    Runs read -> macro -> export for a single file. Never raises; failures
+    are reported in the returned result so one bad file doesn't stop a batch.
+    `on_error` is the policy for values that can't be converted (see
+    validation.py); failed rows are reported in the result's 'validation'
+    and quarantined rows are written next to the output.
+    """
+    start = time.perf_counter()
+    result = {'input': input_path, 'output': output_path, 'rows': 0}
+    try:
+        report = ValidationReport(on_error)
+        # Validated against the header first, then only the needed columns are read;
+        # each file is read once, so caching would only cost memory
+        df = plan_for_file(input_path, actions).read(input_path, use_cache=False, report=report)
+        export_data(df, output_path)
+        if report.quarantined is not None:
+            result['quarantine'] = quarantine_path_for(output_path)
+            export_data(report.quarantined, result['quarantine'])
+        if report:
+            result['validation'] = report.summary()
+        result.update(status='ok', rows=len(df))
+    except Exception as e:
+        result.update(status='error', error=str(e))
+    result['seconds'] = time.perf_counter() - start
+    return result
+
+def _init_worker(tracing):
+    # Spawned worker processes don't inherit the parent's tracer state
+    if tracing:
+        tracer.enable()
+
+def _migrate_traced(migrate, input_path, output_path, actions):
+    """Runs a migration in a worker process and hands its trace events back with the result."""
+    mark = tracer.mark()
+    result = migrate(input_path, output_path, actions)
+    if tracer.enabled:
+        result['trace'] = tracer.take_since(mark)
+    return result
+
+def summarize(results, elapsed):
+    """
+    Aggregates per-file results into a run summary with overall throughput.
+    """
+    succeeded = [result for result in results if result['status'] == 'ok']
+    rows = sum(result['rows'] for result in succeeded)
+    return {
+        'files': len(results),
+        'succeeded': len(succeeded),
+        'failed': len(results) - len(succeeded),
+        'rows': rows,
+        'invalid_rows': sum(result['validation']['failed_rows'] for result in succeeded if 'validation' in result),
+        'seconds': elapsed,
+        'files_per_second': len(results) / elapsed if elapsed else 0.0,
+        'rows_per_second': rows / elapsed if elapsed else 0.0,
+        'results': results,
+    }
+
+def run_bulk(macro, source, output_dir, output_format=None, workers=None, incremental=False, on_error='fail'):
+    """
+    Replays a recorded macro over every file matched by `source` (see
+    collect_inputs) using a process pool. `macro` is either the path of a
+    saved recording or the list of actions itself. Returns a summary with
+    per-file results and the overall throughput. With `incremental`, only
+    rows that changed since the previous run are converted (see
+    incremental.py). `on_error` is the policy for values that can't be
+    converted (see migrate_file).
+
+    Raises:
+        FileNotFoundError: If the macro or the input files cannot be found.
+        ValueError: If the macro or the policy is invalid.
+    """
+    ValidationReport(on_error)  # Checks the policy before any file is read
+    if incremental and on_error != 'fail':
+        raise ValueError("Incremental runs only support the 'fail' error policy")
+    actions = load_macro(macro) if isinstance(macro, str) else macro
+    inputs = collect_inputs(source)
+    os.makedirs(output_dir, exist_ok=True)
+    jobs = [(path, output_path_for(path, output_dir, output_format)) for path in inputs]
+
+    migrate = migrate_incremental if incremental else partial(migrate_file, on_error=on_error)
+    start = time.perf_counter()
+    if workers == 1 or len(jobs) == 1:
+        results = [migrate(input_path, output_path, actions) for input_path, output_path in jobs]
+    else:
+        results = []
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                 initargs=(tracer.enabled,)) as executor:
+            futures = [executor.submit(_migrate_traced, migrate, input_path, output_path, actions)
+                       for input_path, output_path in jobs]
+            for future in as_completed(futures):
+                result = future.result()
+                tracer.extend(result.pop('trace', []))
+                results.append(result)
+        order = {path: index for index, (path, _) in enumerate(jobs)}
+        results.sort(key=lambda result: order[result['input']])
+    elapsed = time.perf_counter() - start
+
+    return summarize(results, elapsed)
@@ -0,0 +1,154 @@
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+
+import pandas as pd
+
+# Default size of the in-memory cache (bytes)
+DEFAULT_CACHE_BYTES = 1024 * 1024 * 1024
+
+# Directory for the on-disk cache, disabled unless set
+CACHE_DIR_ENV = 'FASTMIG_CACHE_DIR'
+
+# On-disk formats: file extension, writer and reader
+PERSIST_FORMATS = {
+    'parquet': ('.parquet', lambda df, path: df.to_parquet(path), pd.read_parquet),
+    'feather': ('.feather', lambda df, path: df.to_feather(path), pd.read_feather),
+    'pickle': ('.pkl', lambda df, path: df.to_pickle(path), pd.read_pickle),
+}
+
+def file_signature(file_path):
+    """
+    Returns the (absolute path, mtime, size) key that identifies one version
+    of a file.
+
+    Raises:
+        FileNotFoundError: If the file does not exist.
+    """
+    stat = os.stat(file_path)
+    return (os.path.abspath(file_path), stat.st_mtime_ns, stat.st_size)
+
+class FileCache:
+    """
+    Cache of parsed files, keyed by path, modification time and size.
+
+    At most one version of each file is kept, and the least recently used
+    files are evicted once the cached DataFrames exceed `max_bytes`. With a
+    `persist_dir`, parsed files are also written there in a fast on-disk
+    format, so reopening a workbook in a later session skips Excel parsing.
+
+    Callers get shallow copies: replacing a column in the returned
+    DataFrame, as convert_column does, leaves the cached frame untouched.
+    """
+
+    def __init__(self, max_bytes=DEFAULT_CACHE_BYTES, persist_dir=None, persist_format='pickle'):
+        if persist_format not in PERSIST_FORMATS:
+            raise ValueError(f"Unsupported cache format: {persist_format}")
+        self.max_bytes = max_bytes
+        self.persist_dir = persist_dir
+        self.persist_format = persist_format
+        self.memory_usage = 0
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()  # abspath -> (signature, df, size)
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, file_path):
+        """Returns the cached DataFrame for the current version of the file, or None."""
+        try:
+            signature = file_signature(file_path)
+        except OSError:
+            return None
+        with self._lock:
+            entry = self._entries.get(signature[0])
+            if entry is not None and entry[0] == signature:
+                self._entries.move_to_end(signature[0])
+                self.hits += 1
+                return entry[1].copy(deep=False)
+            if entry is not None:
+                # The file changed on disk since it was cached
+                del self._entries[signature[0]]
+                self.memory_usage -= entry[2]
+        df = self._load_persisted(signature)
+        if df is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self._store(signature, df)
+        return df.copy(deep=False)
+
+    def put(self, file_path, df):
+        """Caches a freshly parsed DataFrame for the current version of the file."""
+        try:
+            signature = file_signature(file_path)
+        except OSError:
+            return
+        self._store(signature, df)
+        self._persist(signature, df)
+
+    def invalidate(self, file_path):
+        """Drops the file from memory (persisted copies expire with the file's mtime)."""
+        with self._lock:
+            entry = self._entries.pop(os.path.abspath(file_path), None)
+            if entry is not None:
+                self.memory_usage -= entry[2]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.memory_usage = 0
+
+    def _store(self, signature, df):
+        size = int(df.memory_usage(index=True, deep=True).sum())
+        with self._lock:
+            previous = self._entries.pop(signature[0], None)
+            if previous is not None:
+                self.memory_usage -= previous[2]
+            if size > self.max_bytes:
+                return
+            self._entries[signature[0]] = (signature, df, size)
+            self.memory_usage += size
+            while self.memory_usage > self.max_bytes:
+                _, (_, _, evicted_size) = self._entries.popitem(last=False)
+                self.memory_usage -= evicted_size
+
+    # --------------- On-disk Persistence ---------------
+    def _persisted_path(self, signature):
+        extension = PERSIST_FORMATS[self.persist_format][0]
+        path_hash = hashlib.sha1(signature[0].encode('utf-8')).hexdigest()
+        version = f"{signature[1]}-{signature[2]}"
+        return os.path.join(self.persist_dir, f"{path_hash}-{version}{extension}"), path_hash
+
+    def _load_persisted(self, signature):
+        if not self.persist_dir:
+            return None
+        path, _ = self._persisted_path(signature)
+        if not os.path.exists(path):
+            return None
+        try:
+            return PERSIST_FORMATS[self.persist_format][2](path)
+        except Exception:
+            return None  # A corrupt or unreadable cache file is just a miss
+
+    def _persist(self, signature, df):
+        if not self.persist_dir:
+            return
+        path, path_hash = self._persisted_path(signature)
+        try:
+            os.makedirs(self.persist_dir, exist_ok=True)
+            # Only the current version of each file is kept on disk
+            for name in os.listdir(self.persist_dir):
+                if name.startswith(path_hash + '-'):
+                    os.remove(os.path.join(self.persist_dir, name))
+            PERSIST_FORMATS[self.persist_format][1](df, path)
+        except Exception:
+            # Best effort: e.g. parquet rejects non-string column names
+            if os.path.exists(path):
+                os.remove(path)
+
+# Cache shared by read_file and the app
+file_cache = FileCache(persist_dir=os.environ.get(CACHE_DIR_ENV))
@@ -0,0 +1,172 @@
+"""
+Headless command line entry point for FastMig.
+
+Examples:
+    python cli.py data.xlsx -o out.csv -t Prices:decimal -t Procurement:datetime:%Y-%m-%d
+    python cli.py "exports/*.csv" --macro cleanup.json --output-dir migrated --json
+    python cli.py daily.csv --macro cleanup.json -o migrated.csv --incremental
+    python cli.py wide.parquet -t Prices:decimal --columns SKU,Prices -o prices.csv
+    python cli.py book.xlsx --sheets all --macro per_sheet.json -o migrated.xlsx
+    python cli.py "exports/*.csv" -t Prices:decimal -d migrated --on-error quarantine
+
+Only the standard library is imported up front; pandas and the migration
+core are loaded once the arguments have been validated, so `--help` and
+usage errors return immediately.
+"""
+import argparse
+import json
+import sys
+import time
+
+# Exit codes
+EXIT_OK = 0
+EXIT_FAILED = 1  # at least one input could not be migrated
+EXIT_USAGE = 2   # bad arguments, same as argparse
+
+def parse_transformation(value):
+    """
+    Parses an inline transformation of the form COLUMN:TYPE[:FORMAT] into a
+    recorded convert_column action. The format may itself contain colons.
+    """
+    parts = value.split(':', 2)
+    if len(parts) < 2 or not parts[0] or not parts[1]:
+        raise argparse.ArgumentTypeError(f"expected COLUMN:TYPE[:FORMAT], got '{value}'")
+    return {
+        'action_type': 'convert_column',
+        'params': {
+            'column_name': parts[0],
+            'target_type': parts[1],
+            'format_spec': parts[2] if len(parts) == 3 else None,
+        },
+    }
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        prog='fastmig', description='Apply a recorded macro or inline transformations to data files.')
+    parser.add_argument('inputs', nargs='+', help='input files, directories or glob patterns')
+    steps = parser.add_mutually_exclusive_group(required=True)
+    steps.add_argument('-m', '--macro', help='recording saved from the app (JSON)')
+    steps.add_argument('-t', '--transform', dest='transformations', action='append', type=parse_transformation,
+                       metavar='COLUMN:TYPE[:FORMAT]', help='inline conversion, may be repeated')
+    target = parser.add_mutually_exclusive_group(required=True)
+    target.add_argument('-o', '--output', help='output file (single input only)')
+    target.add_argument('-d', '--output-dir', help='directory that receives one output per input')
+    parser.add_argument('-c', '--columns', type=lambda value: [column for column in value.split(',') if column],
+                        help='comma separated output columns; other columns are not read')
+    parser.add_argument('-s', '--sheets', help="process Excel workbooks sheet by sheet: 'all' or comma separated "
+                        "sheet names; the macro may then map sheet names ('*' for the rest) to actions")
+    parser.add_argument('-f', '--format', help='output extension for --output-dir, e.g. csv or xlsx')
+    parser.add_argument('-w', '--workers', type=int, help='worker processes (default: one per CPU)')
+    parser.add_argument('-i', '--incremental', action='store_true',
+                        help='only convert rows that changed since the previous run into the same output')
+    parser.add_argument('-e', '--on-error', choices=('fail', 'coerce', 'quarantine'), default='fail',
+                        help="values that can't be converted: fail the file (default), keep the rows with "
+                        "empty cells, or move the rows to <output>.quarantine.<ext>")
+    parser.add_argument('--trace', metavar='PATH',
+                        help='write a Chrome trace (chrome://tracing) of every stage to PATH and print a profile')
+    parser.add_argument('--json', action='store_true', help='print the run summary as JSON on stdout')
+    return parser
+
+def print_summary(summary):
+    for result in summary['results']:
+        if result['status'] == 'ok':
+            reused = f", {result['reused']} reused" if result.get('reused') else ''
+            print(f"ok     {result['input']} -> {result['output']} "
+                  f"({result['rows']} rows{reused}, {result['seconds']:.3f}s)")
+            validation = result.get('validation')
+            if validation:
+                quarantine = f", moved to {result['quarantine']}" if result.get('quarantine') else ''
+                print(f"       {validation['failed_rows']} rows with values that could not be converted{quarantine}")
+                for column, errors in validation['columns'].items():
+                    samples = ', '.join(f"row {row}: {value!r}" for row, value in errors['samples'])
+                    print(f"       {column} ({errors['type']}): {errors['count']} rows, e.g. {samples}")
+        else:
+            print(f"error  {result['input']}: {result['error']}", file=sys.stderr)
+    print(f"{summary['succeeded']}/{summary['files']} files, {summary['rows']} rows "
+          f"in {summary['seconds']:.3f}s ({summary['rows_per_second']:.0f} rows/s), "
+          f"total {summary['total_seconds']:.3f}s")
+
+def select_step(columns):
+    return {'action_type': 'select_columns', 'params': {'columns': columns}}
+
+def migrate_files(args, parser):
+    """Migrates each input file as a single table. Returns the run summary."""
+    from bulk import collect_inputs, migrate_file, run_bulk, summarize
+    from functions import load_macro
+    from incremental import migrate_incremental
+
+    actions = load_macro(args.macro) if args.macro else args.transformations
+    if args.columns:
+        actions = actions + [select_step(args.columns)]
+    if not args.output:
+        return run_bulk(actions, args.inputs, args.output_dir, args.format, args.workers, args.incremental,
+                        args.on_error)
+    inputs = collect_inputs(args.inputs)
+    if len(inputs) != 1:
+        parser.error('--output takes exactly one input file, use --output-dir for several')
+    if args.incremental:
+        result = migrate_incremental(inputs[0], args.output, actions)
+    else:
+        result = migrate_file(inputs[0], args.output, actions, args.on_error)
+    return summarize([result], result['seconds'])
+
+def migrate_workbooks(args, parser):
+    """Migrates each input workbook sheet by sheet into a workbook. Returns the run summary."""
+    import os
+    from bulk import collect_inputs, output_path_for, summarize
+    from workbook import load_sheet_macros, migrate_workbook, ALL_SHEETS
+
+    macros = load_sheet_macros(args.macro) if args.macro else {ALL_SHEETS: args.transformations}
+    if args.columns:
+        macros = {sheet: actions + [select_step(args.columns)] for sheet, actions in macros.items()}
+    sheets = None if args.sheets in ('all', '*') else [sheet for sheet in args.sheets.split(',') if sheet]
+    inputs = collect_inputs(args.inputs)
+    if args.output:
+        if len(inputs) != 1:
+            parser.error('--output takes exactly one input file, use --output-dir for several')
+        jobs = [(inputs[0], args.output)]
+    else:
+        os.makedirs(args.output_dir, exist_ok=True)
+        jobs = [(path, output_path_for(path, args.output_dir, args.format)) for path in inputs]
+    # Sheets of each workbook are already parsed in parallel, so workbooks run one after another
+    results = [migrate_workbook(input_path, output_path, macros, sheets, args.workers)
+               for input_path, output_path in jobs]
+    return summarize(results, sum(result['seconds'] for result in results))
+
+def main(argv=None):
+    start = time.perf_counter()
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    if args.workers is not None and args.workers < 1:
+        parser.error('--workers must be at least 1')
+    if args.sheets and args.incremental:
+        parser.error('--incremental does not support --sheets')
+    if args.on_error != 'fail' and (args.sheets or args.incremental):
+        parser.error('--on-error coerce and quarantine do not support --sheets or --incremental')
+
+    # Deferred so that argument errors don't pay for importing pandas
+    from instrumentation import tracer
+    if args.trace:
+        tracer.enable()
+
+    try:
+        summary = migrate_workbooks(args, parser) if args.sheets else migrate_files(args, parser)
+    except (FileNotFoundError, ValueError) as e:
+        print(f"fastmig: error: {e}", file=sys.stderr)
+        return EXIT_USAGE
+
+    summary['total_seconds'] = time.perf_counter() - start
+    if args.trace:
+        tracer.write_chrome_trace(args.trace)
+        summary['profile'] = tracer.summary()
+    if args.json:
+        json.dump(summary, sys.stdout, indent=2)
+        sys.stdout.write("\n")
+    else:
+        print_summary(summary)
+        if args.trace:
+            print(tracer.format_summary())
+    return EXIT_OK if summary['failed'] == 0 else EXIT_FAILED
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,107 @@
+import numpy as np
+import pandas as pd
+
+from functions import read_file, file_format
+from inference import sample_column, DEFAULT_SAMPLE_SIZE
+
+# A text column is dictionary-encoded when its sample has at most this share
+# of distinct values
+CATEGORY_RATIO = 0.5
+
+def plan_dtypes(sample, category_ratio=CATEGORY_RATIO):
+    """
+    Decides from a sample which text columns to load as categories.
+    Returns {column: 'category'}.
+    """
+    dtypes = {}
+    for column in sample.columns:
+        values = sample[column].dropna()
+        if (len(values) and pd.api.types.is_string_dtype(values)
+                and values.nunique() <= category_ratio * len(values)):
+            dtypes[column] = 'category'
+    return dtypes
+
+def _downcast(series, allow_float32):
+    """Returns the narrowest numeric dtype that holds every value of the column exactly."""
+    if pd.api.types.is_bool_dtype(series):
+        return series
+    if pd.api.types.is_integer_dtype(series):
+        return pd.to_numeric(series, downcast='integer')
+    if pd.api.types.is_float_dtype(series) and allow_float32 and series.dtype != np.float32:
+        narrow = series.astype(np.float32)
+        # Only keep float32 when no value loses precision
+        same = (narrow.astype(series.dtype) == series) | series.isna()
+        return narrow if same.all() else series
+    return series
+
+def optimize_dtypes(df, sample_size=DEFAULT_SAMPLE_SIZE, category_ratio=CATEGORY_RATIO, allow_float32=True, seed=0):
+    """
+    Shrinks a loaded DataFrame: text columns with few distinct values in a
+    sample become categories, integers are downcast to the smallest integer
+    type that fits (int8/int16/int32) and floats to float32 when that is
+    lossless. Returns the DataFrame and a report of the bytes saved.
+    """
+    before = df.memory_usage(index=False, deep=True)
+    sample = pd.DataFrame({column: sample_column(df[column], sample_size, seed) for column in df.columns})
+    categories = plan_dtypes(sample, category_ratio)
+    for column in df.columns:
+        if column in categories:
+            df[column] = df[column].astype('category')
+        else:
+            df[column] = _downcast(df[column], allow_float32)
+    return df, memory_report(before, df)
+
+def read_file_compact(file_path, columns=None, sample_size=DEFAULT_SAMPLE_SIZE, category_ratio=CATEGORY_RATIO,
+                      allow_float32=True):
+    """
+    Reads a file in its most compact form. For CSV the category decision is
+    made from the first `sample_size` rows, so repetitive text columns are
+    dictionary-encoded while parsing and never exist as Python strings;
+    other formats are shrunk right after loading. Returns the DataFrame and
+    a report of the bytes saved.
+
+    Raises:
+        ValueError: If the file format is unsupported.
+        FileNotFoundError: If the file path does not exist.
+    """
+    format, compression = file_format(file_path)
+    if format != 'csv':
+        return optimize_dtypes(read_file(file_path, use_cache=False, columns=columns), sample_size,
+                               category_ratio, allow_float32)
+    try:
+        sample = pd.read_csv(file_path, usecols=columns, nrows=sample_size, compression=compression)
+        df = pd.read_csv(file_path, usecols=columns, compression=compression,
+                         dtype=plan_dtypes(sample, category_ratio))
+    except FileNotFoundError:
+        raise FileNotFoundError(f"File not found: {file_path}")
+    except Exception as e:
+        raise RuntimeError(f"An error occurred while reading the file: {e}")
+    if columns is not None:
+        df = df[list(columns)]
+
+    # Estimate the plain load from the sample, it is never materialized
+    rows_per_sample = len(df) / len(sample) if len(sample) else 0
+    before = sample.memory_usage(index=False, deep=True) * rows_per_sample
+    for column in df.columns:
+        if isinstance(df[column].dtype, pd.CategoricalDtype):
+            # Catch sample misses: encoding near-unique columns saves nothing
+            if len(df[column].cat.categories) > category_ratio * len(df):
+                df[column] = df[column].astype(sample[column].dtype)
+        else:
+            df[column] = _downcast(df[column], allow_float32)
+    return df, memory_report(before, df)
+
+def memory_report(before, df):
+    """Builds the bytes-saved report from per-column sizes before and the compacted DataFrame."""
+    after = df.memory_usage(index=False, deep=True)
+    report = {
+        'before_bytes': int(before.sum()),
+        'after_bytes': int(after.sum()),
+        'columns': {
+            str(column): {'dtype': str(df[column].dtype), 'before_bytes': int(before[column]),
+                          'after_bytes': int(after[column])}
+            for column in df.columns
+        },
+    }
+    report['saved_bytes'] = report['before_bytes'] - report['after_bytes']
+    return report
@@ -0,0 +1,298 @@
+"""
+Macro compiler: turns a recorded macro into an execution plan for one
+input schema.
+
+compile_macro checks every action against the columns that exist at that
+point before any rows are read, so a macro recorded on another export fails
+fast with the step that doesn't fit. It then
+
+    - drops conversions whose result never reaches the output, e.g. columns
+      a later select_columns step leaves out,
+    - drops repeated conversions of a column to a type it already has,
+    - groups the remaining conversions into single-pass stages
+      (see functions.plan_transformations), and
+    - works out which input columns the output needs, so only those are
+      read (usecols).
+
+Plans only depend on the macro and the header, so cached_plan reuses them
+across files with the same header.
+"""
+import re
+from collections import OrderedDict
+
+from functions import (
+    read_file, read_header, macro_digest, plan_transformations, apply_transformations, split_column,
+    select_columns, SUPPORTED_TYPES, SPLIT_METHODS, DATETIME_PARTS
+)
+
+# Target types for which converting a column a second time is a no-op
+IDEMPOTENT_TYPES = ('category', 'int', 'decimal', 'bool', 'object', 'string', 'datetime', 'date')
+
+# Plans kept by cached_plan
+MAX_CACHED_PLANS = 128
+
+class ExecutionPlan:
+    """
+    A validated, optimized macro for one input header. `columns` lists the
+    input columns to read (None for all of them) and `steps` the work to do:
+    ('convert', [transformations]), ('split', params) or ('select', columns).
+    """
+
+    def __init__(self, header, columns, steps, dropped):
+        self.header = header
+        self.columns = columns
+        self.steps = steps
+        self.dropped = dropped  # Indexes of the recorded actions that were optimized away
+
+    def __repr__(self):
+        return (f"ExecutionPlan({len(self.steps)} steps, {len(self.dropped)} dropped, "
+                f"reads {len(self.columns) if self.columns is not None else 'all'} columns)")
+
+    def run(self, df, report=None):
+        """
+        Runs the plan on a DataFrame read with `columns`. With a report,
+        values that can't be converted are handled by its policy.
+
+        Raises:
+            RuntimeError: If a step fails.
+        """
+        source = df.copy(deep=False)
+        for kind, params in self.steps:
+            if kind == 'convert':
+                df = apply_transformations(df, params, report)
+            elif kind == 'split':
+                df, _ = split_column(df, **params)
+            else:
+                df = select_columns(df, params)
+        return report.partition(source, df) if report is not None else df
+
+    def read(self, file_path, use_cache=True, report=None):
+        """Reads the columns the plan needs from a file and runs the plan on them."""
+        return self.run(read_file(file_path, use_cache=use_cache, columns=self.columns), report)
+
+# --------------- Validation ---------------
+def _split_outputs(params):
+    """
+    Returns the names of the columns a split creates, or None when that
+    depends on the data (delimiter splits without names).
+    """
+    column, method = params['column_name'], params['method']
+    if params.get('names'):
+        return list(params['names'])
+    if method == 'fixed_width':
+        return [f'{column}_{index + 1}' for index in range(len(params['widths']))]
+    if method == 'regex':
+        compiled = re.compile(params['pattern'])
+        if len(compiled.groupindex) == compiled.groups:
+            return sorted(compiled.groupindex, key=compiled.groupindex.get)
+        return [f'{column}_{index + 1}' for index in range(compiled.groups)]
+    if method == 'datetime':
+        return [f'{column}_{part}' for part in params.get('parts') or ['date', 'time']]
+    return None
+
+def _check_split(params):
+    method = params.get('method')
+    if method not in SPLIT_METHODS:
+        raise ValueError(f"unsupported split method: {method}")
+    if method == 'delimiter' and not params.get('delimiter'):
+        raise ValueError("a delimiter is required")
+    if method == 'fixed_width':
+        widths = params.get('widths')
+        if not widths or not all(isinstance(width, int) and width > 0 for width in widths):
+            raise ValueError("positive field widths are required")
+    if method == 'regex':
+        try:
+            groups = re.compile(params.get('pattern') or '').groups
+        except re.error as e:
+            raise ValueError(f"invalid pattern: {e}")
+        if not groups:
+            raise ValueError("the pattern needs at least one capture group")
+    if method == 'datetime':
+        unknown = [part for part in params.get('parts') or [] if part not in DATETIME_PARTS]
+        if unknown:
+            raise ValueError(f"unsupported datetime parts: {', '.join(unknown)}")
+
+class _Schema:
+    """Columns available while walking through a macro."""
+
+    def __init__(self, header):
+        self.columns = list(header)
+        self.open_prefixes = []  # Delimiter splits add '<column>_<n>' columns, n unknown in advance
+
+    def has(self, column):
+        return column in self.columns or any(re.fullmatch(re.escape(prefix) + r'_\d+', str(column))
+                                             for prefix in self.open_prefixes)
+
+    def require(self, columns):
+        missing = [column for column in columns if not self.has(column)]
+        if missing:
+            raise ValueError(f"column not found: {', '.join(map(str, missing))}")
+
+def _validate(actions, header):
+    """
+    Walks through the actions with the columns they will see. Returns the
+    normalized actions as (kind, params) and the columns each split creates.
+
+    Raises:
+        ValueError: If an action is unsupported or doesn't fit the schema.
+    """
+    schema = _Schema(header)
+    normalized, outputs = [], []
+    for index, action in enumerate(actions):
+        action_type = action.get('action_type')
+        params = action.get('params', {})
+        try:
+            if action_type == 'convert_column':
+                target_type = params.get('target_type')
+                if target_type not in SUPPORTED_TYPES:
+                    raise ValueError(f"unsupported target type: {target_type}")
+                schema.require([params.get('column_name')])
+                normalized.append(('convert', {'column': params['column_name'], 'type': target_type,
+                                               'format': params.get('format_spec')}))
+                outputs.append(None)
+            elif action_type == 'split_column':
+                schema.require([params.get('column_name')])
+                _check_split(params)
+                created = _split_outputs(params)
+                # Like split_column, the split column may only be reused as a name when it is dropped
+                replaced = (params['column_name'],) if params.get('keep_original') is False else ()
+                if created is not None:
+                    clashes = [name for name in created if name in schema.columns and name not in replaced]
+                    if clashes:
+                        raise ValueError(f"columns already exist: {', '.join(map(str, clashes))}")
+                else:
+                    schema.open_prefixes.append(params['column_name'])
+                if replaced and params['column_name'] in schema.columns:
+                    schema.columns.remove(params['column_name'])
+                if created is not None:
+                    schema.columns.extend(created)
+                normalized.append(('split', dict(params)))
+                outputs.append(created)
+            elif action_type == 'select_columns':
+                schema.require(params.get('columns') or [])
+                schema.columns, schema.open_prefixes = list(params['columns']), []
+                normalized.append(('select', list(params['columns'])))
+                outputs.append(None)
+            else:
+                raise ValueError(f"unsupported macro action: {action_type}")
+        except (KeyError, TypeError, ValueError) as e:
+            message = e.args[0] if e.args else e
+            raise ValueError(f"Invalid macro step {index + 1} ({action_type}): {message}")
+    return normalized, outputs
+
+# --------------- Optimization ---------------
+def _needed_columns(normalized, outputs, header):
+    """
+    Walks backwards from the output and marks the actions whose result is
+    used. Returns the live flags and the input columns that must be read
+    (None when every column is needed).
+    """
+    needed = None  # None: every column reaches the output
+    live = [True] * len(normalized)
+    for index in range(len(normalized) - 1, -1, -1):
+        kind, params = normalized[index]
+        if kind == 'select':
+            needed = set(params)
+        elif needed is None:
+            continue
+        elif kind == 'convert':
+            live[index] = params['column'] in needed
+        else:
+            created = outputs[index]
+            column = params['column_name']
+            if created is None:
+                pattern = re.compile(re.escape(str(column)) + r'_\d+')
+                used = any(pattern.fullmatch(str(name)) for name in needed)
+            else:
+                used = bool(needed.intersection(created))
+            live[index] = used
+            if used:
+                needed.add(column)
+    if needed is None:
+        return live, None
+    return live, [column for column in header if column in needed]
+
+def _forget_types(last_type, kind, params, created):
+    """
+    Removes the columns a split or select replaces or drops from `last_type`,
+    so a later conversion of a column with the same name isn't taken for a
+    repeat.
+    """
+    if kind == 'select':
+        for column in [column for column in last_type if column not in params]:
+            del last_type[column]
+        return
+    if created is None:
+        pattern = re.compile(re.escape(str(params['column_name'])) + r'_\d+')
+        created = [column for column in last_type if pattern.fullmatch(str(column))]
+    for column in created:
+        last_type.pop(column, None)
+    if params.get('keep_original') is False:
+        last_type.pop(params['column_name'], None)
+
+def compile_macro(actions, header):
+    """
+    Compiles macro actions for files with the given header into an
+    ExecutionPlan.
+
+    Raises:
+        ValueError: If an action is unsupported or doesn't fit the header.
+    """
+    header = list(header)
+    normalized, outputs = _validate(actions, header)
+    live, columns = _needed_columns(normalized, outputs, header)
+
+    steps, dropped, stage = [], [], []
+    last_type = {}  # column -> type of its latest conversion in the plan
+    for index, ((kind, params), keep) in enumerate(zip(normalized, live)):
+        if kind == 'convert' and keep and last_type.get(params['column']) == params['type'] in IDEMPOTENT_TYPES:
+            keep = False
+        if kind != 'convert':
+            _forget_types(last_type, kind, params, outputs[index])
+        if not keep:
+            dropped.append(index)
+            continue
+        if kind == 'convert':
+            stage.append(params)
+            last_type[params['column']] = params['type']
+            continue
+        if stage:
+            steps.extend(('convert', transformations) for transformations in plan_transformations(stage))
+            stage = []
+        steps.append((kind, params))
+    if stage:
+        steps.extend(('convert', transformations) for transformations in plan_transformations(stage))
+    if columns == header:
+        columns = None
+    return ExecutionPlan(header, columns, steps, dropped)
+
+# --------------- Plan Cache ---------------
+_plans = OrderedDict()
+
+def cached_plan(actions, header):
+    """
+    Returns the compiled plan for the macro and header, compiling it on
+    first use. Files that share a header share the plan.
+
+    Raises:
+        ValueError: If an action is unsupported or doesn't fit the header.
+    """
+    key = (macro_digest(actions), tuple(header))
+    plan = _plans.get(key)
+    if plan is None:
+        plan = _plans[key] = compile_macro(actions, header)
+        if len(_plans) > MAX_CACHED_PLANS:
+            _plans.popitem(last=False)
+    else:
+        _plans.move_to_end(key)
+    return plan
+
+def plan_for_file(file_path, actions):
+    """
+    Returns the plan for running the macro on a file, reading only its header.
+
+    Raises:
+        ValueError: If the file format is unsupported or the macro doesn't fit the file.
+        FileNotFoundError: If the file path does not exist.
+    """
+    return cached_plan(actions, read_header(file_path))
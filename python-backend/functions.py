@@ -1,79 +1,622 @@
 import pandas as pd
+import hashlib
 import json
+import os
+import warnings
 
-def read_file(file_path):
+from cache import file_cache
+from instrumentation import tracer
+from validation import ValidationReport, ConversionError
+
+try:
+    from pandas.tseries.api import guess_datetime_format
+except ImportError:  # pandas < 2.2
+    from pandas._libs.tslibs.parsing import guess_datetime_format
+
+# Number of rows held in memory at once by the streaming helpers
+DEFAULT_CHUNK_SIZE = 100000
+
+# File formats by extension
+FILE_FORMATS = {
+    '.csv': 'csv',
+    '.xls': 'excel',
+    '.xlsx': 'excel',
+    '.parquet': 'parquet',
+    '.pq': 'parquet',
+    '.feather': 'feather',
+    '.arrow': 'feather',
+    '.jsonl': 'jsonl',
+    '.ndjson': 'jsonl',
+}
+
+# Compression suffixes accepted after text formats, e.g. data.csv.gz
+COMPRESSIONS = {
+    '.gz': 'gzip',
+    '.zst': 'zstd',
+    '.bz2': 'bz2',
+    '.xz': 'xz',
+}
+
+# Excel parser: calamine (Rust) when python-calamine is installed, otherwise
+# pandas' default openpyxl reader, which streams sheets in read-only mode
+try:
+    import python_calamine  # noqa: F401
+    EXCEL_ENGINE = 'calamine'
+except ImportError:
+    EXCEL_ENGINE = None
+
+def file_format(file_path):
     """
-    Reads a CSV or Excel file into a pandas DataFrame.
+    Returns the (format, compression) of a file from its extension, e.g.
+    ('csv', 'gzip') for data.csv.gz. Compression is None for plain files.
+    
+    Raises:
+        ValueError: If the file format is unsupported.
+    """
+    root, extension = os.path.splitext(file_path.lower())
+    compression = COMPRESSIONS.get(extension)
+    if compression:
+        root, extension = os.path.splitext(root)
+    format = FILE_FORMATS.get(extension)
+    if format is None or (compression and format not in ('csv', 'jsonl')):
+        raise ValueError("Unsupported file format")
+    return format, compression
+
+def _read_by_format(file_path, columns=None, sheet_name=None):
+    format, compression = file_format(file_path)
+    if format == 'csv':
+        df = pd.read_csv(file_path, usecols=columns, compression=compression)
+    elif format == 'excel':
+        df = pd.read_excel(file_path, sheet_name=sheet_name or 0, usecols=columns, engine=EXCEL_ENGINE)
+    elif format == 'parquet':
+        df = pd.read_parquet(file_path, columns=columns)
+    elif format == 'feather':
+        df = pd.read_feather(file_path, columns=columns)
+    else:
+        df = pd.read_json(file_path, lines=True, dtype=False, convert_dates=False, compression=compression)
+    # usecols keeps the file's column order, return the requested order
+    return df[list(columns)] if columns is not None else df
+
+def read_header(file_path, sheet_name=None):
+    """
+    Returns the column names of a file (or of one sheet of a workbook)
+    without loading its rows.
     
     Raises:
         ValueError: If the file format is unsupported.
         FileNotFoundError: If the file path does not exist.
     """
+    format, compression = file_format(file_path)
     try:
-        if file_path.endswith('.csv'):
-            df = pd.read_csv(file_path)
-        elif file_path.endswith(('.xls', '.xlsx')):
-            df = pd.read_excel(file_path)
+        if format == 'csv':
+            columns = pd.read_csv(file_path, nrows=0, compression=compression).columns
+        elif format == 'excel':
+            columns = pd.read_excel(file_path, sheet_name=sheet_name or 0, nrows=0, engine=EXCEL_ENGINE).columns
+        elif format == 'parquet':
+            import pyarrow.parquet as pq
+            columns = [name for name in pq.read_schema(file_path).names if not name.startswith('__index_level_')]
+        elif format == 'feather':
+            import pyarrow as pa
+            with pa.memory_map(file_path) as source:
+                columns = pa.ipc.open_file(source).schema.names
         else:
-            raise ValueError("Unsupported file format")
-        return df
+            columns = pd.read_json(file_path, lines=True, nrows=1, dtype=False, convert_dates=False,
+                                   compression=compression).columns
     except FileNotFoundError:
         raise FileNotFoundError(f"File not found: {file_path}")
     except Exception as e:
         raise RuntimeError(f"An error occurred while reading the file: {e}")
+    return list(columns)
+
+def read_file(file_path, use_cache=True, columns=None, sheet_name=None):
+    """
+    Reads a CSV, Excel, Parquet, Feather/Arrow IPC or JSON Lines file (CSV
+    and JSON Lines optionally gzip/zstd compressed) into a pandas DataFrame.
+    Only `columns` are loaded when given. Excel files are read from their
+    first sheet unless `sheet_name` is given (see workbook.py for whole
+    workbooks). Parsed files are kept in the shared file cache, so reading
+    an unchanged file again is free.
+    
+    Raises:
+        ValueError: If the file format is unsupported.
+        FileNotFoundError: If the file path does not exist.
+    """
+    # The cache holds one DataFrame per file, i.e. its first sheet
+    use_cache = use_cache and sheet_name is None
+    if use_cache:
+        with tracer.stage('read_cache', path=file_path) as stage:
+            df = file_cache.get(file_path)
+            stage.rows = len(df) if df is not None else 0
+        if df is not None:
+            return df[list(columns)] if columns is not None else df
+    with tracer.stage('read_file', path=file_path, sheet=sheet_name) as stage:
+        try:
+            df = _read_by_format(file_path, columns, sheet_name)
+            stage.rows = len(df)
+        except FileNotFoundError:
+            raise FileNotFoundError(f"File not found: {file_path}")
+        except Exception as e:
+            raise RuntimeError(f"An error occurred while reading the file: {e}")
+    if use_cache and columns is None:
+        # Only whole files are cached, projections are cheap to redo
+        file_cache.put(file_path, df)
+        return df.copy(deep=False)
+    return df
+
+# Target types that are a plain astype, with the dtype they convert to
+ASTYPE_TARGETS = {
+    'decimal': float,
+    'int': int,
+    'bool': bool,
+    'category': 'category',
+    'string': str,
+    'object': 'object',
+}
+
+# Text values understood by the bool conversion (compared lower-case)
+BOOL_VALUES = {
+    'true': True, 'yes': True, 'y': True, 't': True, '1': True,
+    'false': False, 'no': False, 'n': False, 'f': False, '0': False,
+}
+
+# Target types handled by the datetime engine
+DATETIME_TARGETS = ('datetime', 'date', 'time', 'unix')
+
+# Every target type convert_column supports
+SUPPORTED_TYPES = (*ASTYPE_TARGETS, *DATETIME_TARGETS, 'binary')
+
+# Unix epoch formats and the unit they count; 'unix' means seconds
+UNIX_UNITS = {'unix': 's', 'unix_s': 's', 'unix_ms': 'ms', 'unix_us': 'us'}
+
+# Text columns with at most this share of distinct values are parsed once
+# per distinct value and the results are repeated for the other rows
+UNIQUE_PARSE_RATIO = 0.5
+
+# Distinct values looked at when detecting a datetime format
+FORMAT_SAMPLE_SIZE = 100
+
+# Share of the sampled values the detected datetime format has to parse
+FORMAT_MATCH_RATIO = 0.9
+
+def detect_datetime_format(values):
+    """
+    Returns the strftime format that parses the most sampled strings,
+    guessed (month-first, then day-first) from the first values, or None if
+    none parses at least FORMAT_MATCH_RATIO of them. A few dirty values
+    don't rule out the dominant format; they become NaT and are handled by
+    the validation policy.
+    """
+    values = pd.Series(values, dtype=object).astype(str)
+    with warnings.catch_warnings():
+        # Day-first guesses are wanted here, don't warn about them
+        warnings.simplefilter('ignore', UserWarning)
+        guesses = pd.Series([guess_datetime_format(value, dayfirst=dayfirst)
+                             for dayfirst in (False, True) for value in values.iloc[:20]]).dropna()
+    best, parsed = None, 0
+    for candidate in guesses.value_counts().index:
+        count = int(pd.to_datetime(values, format=candidate, errors='coerce').notna().sum())
+        if count > parsed:
+            best, parsed = candidate, count
+        if parsed == len(values):
+            break
+    return best if parsed and parsed >= FORMAT_MATCH_RATIO * len(values) else None
+
+def _take_distinct(converted, codes, index, name=None):
+    """
+    Repeats results computed once per distinct value (a Series or DataFrame
+    indexed 0..n-1) for every row, picking them by the rows' factorize
+    codes. Code -1 marks a missing value and picks a missing row appended
+    at the end.
+    """
+    if (codes == -1).any():
+        converted = converted.reindex(range(len(converted) + 1))
+    taken = converted.iloc[codes]
+    if isinstance(taken, pd.DataFrame):
+        return taken.set_axis(index)
+    return pd.Series(taken.array, index=index, name=name)
+
+def _map_distinct(series, function, codes=None, uniques=None):
+    """
+    Applies `function` to a Series of the distinct values of `series` and
+    repeats its results for every row, so repetitive columns do the work
+    once per distinct value. Pass `codes` and `uniques` when already factorized.
+    """
+    if codes is None:
+        codes, uniques = pd.factorize(series)
+    return _take_distinct(function(pd.Series(uniques)), codes, series.index, series.name)
+
+def _parse_datetimes(series, format=None):
+    """
+    Parses a column into datetimes. `format` is a strftime format, a unix
+    epoch format ('unix', 'unix_s', 'unix_ms', 'unix_us') or None to detect
+    the dominant format once from a sample of the distinct values. Values
+    that can't be parsed become NaT.
+
+    Raises:
+        ValueError: If the column is numeric and `format` is not a unix epoch format.
+    """
+    if format in UNIX_UNITS:
+        return pd.to_datetime(pd.to_numeric(series, errors='coerce'), unit=UNIX_UNITS[format], errors='coerce')
+    if pd.api.types.is_datetime64_any_dtype(series):
+        return series
+    if series.isna().all():
+        # Blank columns (or chunks of them) are read as float
+        return pd.Series(pd.NaT, index=series.index, name=series.name, dtype='datetime64[ns]')
+    if pd.api.types.is_numeric_dtype(series):
+        # pandas would read the numbers as nanoseconds since the epoch
+        raise ValueError("Numeric values need a unix epoch format: " + ', '.join(UNIX_UNITS))
+    if not pd.api.types.is_string_dtype(series):
+        return pd.to_datetime(series, format=format, errors='coerce')
+
+    # Extracts repeat the same few dates, so parse each distinct string once
+    codes, uniques = pd.factorize(series)
+    if format is None:
+        format = detect_datetime_format(uniques[:FORMAT_SAMPLE_SIZE])
+    if len(uniques) > UNIQUE_PARSE_RATIO * len(series):
+        return pd.to_datetime(series, format=format, errors='coerce')
+    with warnings.catch_warnings():
+        # Without a detectable format pandas warns that it falls back to dateutil
+        warnings.simplefilter('ignore', UserWarning)
+        return _map_distinct(series, lambda values: pd.to_datetime(values, format=format, errors='coerce'),
+                             codes, uniques)
+
+def _convert_datetime(series, target_type, format=None):
+    """
+    Converts a column with the datetime engine. For 'datetime', 'date' and
+    'time', `format` describes the input (see _parse_datetimes). For 'unix'
+    the column is parsed if needed and `format` picks the output unit ('s',
+    'ms', 'us' or one of the unix formats, seconds by default); numeric
+    columns are taken to be epochs in that unit already.
+    """
+    if target_type == 'unix':
+        unit = UNIX_UNITS.get(format, format) or 's'
+        if unit not in ('s', 'ms', 'us'):
+            raise ValueError(f"Unsupported unix epoch unit: {format}")
+        # Numbers are taken as epochs in the requested unit
+        numeric = pd.api.types.is_numeric_dtype(series) and not pd.api.types.is_bool_dtype(series)
+        parsed = _parse_datetimes(series, f'unix_{unit}' if numeric else None)
+        epoch = pd.Timestamp(0, tz=parsed.dt.tz)
+        return (parsed - epoch) // pd.Timedelta(1, unit=unit)
+    parsed = _parse_datetimes(series, format)
+    if target_type == 'date':
+        return parsed.dt.normalize()
+    if target_type == 'time':
+        return parsed.dt.time
+    return parsed
+
+def _is_converted(series, target_type):
+    """
+    Returns True if the series already has the dtype the conversion would
+    produce, so the conversion can be skipped without copying the column.
+    """
+    if target_type == 'category':
+        return isinstance(series.dtype, pd.CategoricalDtype)
+    # Any width counts, so compact int8/float32 columns are not re-expanded
+    if target_type == 'int':
+        return pd.api.types.is_integer_dtype(series) and not pd.api.types.is_bool_dtype(series)
+    if target_type == 'decimal':
+        return pd.api.types.is_float_dtype(series)
+    if target_type in ('bool', 'object'):
+        return series.dtype == pd.api.types.pandas_dtype(ASTYPE_TARGETS[target_type])
+    return False
+
+def _convert_categorical(series, target_type, format=None):
+    """
+    Converts a category column through its categories, so the work is done
+    once per distinct value. Text stays dictionary-encoded: a 'string'
+    conversion only renames the categories.
+    """
+    codes = series.cat.codes.to_numpy()
+    missing = (codes == -1).any()
+    if target_type == 'string' and missing:
+        return series.astype(str)  # Missing values become 'nan' like in any other column
+    converted = _convert_series(pd.Series(series.cat.categories), target_type, format)
+    if target_type == 'string' and converted.is_unique:
+        return series.cat.rename_categories(pd.Index(converted))
+    return _take_distinct(converted, codes, series.index, series.name)
+
+def _convert_series(series, target_type, format=None):
+    """
+    Returns the series converted to the target type.
+    
+    Raises:
+        ValueError: If the target type is unsupported.
+    """
+    if target_type not in SUPPORTED_TYPES:
+        raise ValueError(f"Unsupported target type: {target_type}")
+    if isinstance(series.dtype, pd.CategoricalDtype) and target_type not in ('category', 'object'):
+        return _convert_categorical(series, target_type, format)
+    if target_type in DATETIME_TARGETS:
+        return _convert_datetime(series, target_type, format)
+    if target_type == 'binary':
+        # Vectorized UTF-8 encoding; non-string values become NaN and are
+        # reported by the null check like any other failed conversion
+        return series.str.encode('utf-8')
+    if _is_converted(series, target_type):
+        return series
+    if target_type == 'bool' and pd.api.types.is_string_dtype(series):
+        # astype(bool) would turn every non-empty string, even 'False', into True
+        mapped = series.str.strip().str.lower().map(BOOL_VALUES)
+        return mapped if mapped.hasnans else mapped.astype(bool)
+    if target_type == 'int' and pd.api.types.is_float_dtype(series):
+        # Missing values stay missing (the column stays float) and fractions
+        # become NaN, so the null check reports them instead of truncating
+        whole = series.where(series % 1 == 0)
+        return whole if whole.hasnans else whole.astype(int)
+    try:
+        return series.astype(ASTYPE_TARGETS[target_type])
+    except (ValueError, TypeError):
+        if target_type not in ('int', 'decimal') or not pd.api.types.is_string_dtype(series):
+            raise
+    # Slower path, only for text with values that aren't numbers (or missing
+    # values for int): those become NaN and the null check reports them row by row
+    numbers = pd.to_numeric(series, errors='coerce')
+    if target_type == 'decimal':
+        return numbers.astype(float)
+    numbers = numbers.where(numbers % 1 == 0)
+    return numbers if numbers.hasnans else numbers.astype(int)
+
+def _convert_columns(df, transformations, report=None):
+    """
+    Converts a group of transformations that each touch a different column,
+    then compares each column's null mask before and after its conversion
+    in a single pass at the end. Values that were already missing are not
+    failures. Failed rows are handled by the report's policy (see
+    validation.py); without a report the conversion fails.
+    
+    Raises:
+        RuntimeError: If a conversion fails.
+        ConversionError: If values could not be converted under the 'fail' policy.
+    """
+    report = report if report is not None else ValidationReport()
+    originals = {}
+    for transformation in transformations:
+        column_name, target_type = transformation['column'], transformation['type']
+        try:
+            if column_name not in df.columns:
+                raise KeyError(f"Column '{column_name}' not found in DataFrame")
+            with tracer.stage('convert_column', rows=len(df), column=column_name, type=target_type):
+                originals[column_name] = df[column_name]
+                df[column_name] = _convert_series(df[column_name], target_type, transformation.get('format'))
+        except Exception as e:
+            raise RuntimeError(f"Error converting column '{column_name}' to {target_type}: {e}")
+
+    with tracer.stage('null_check', rows=len(df), columns=len(transformations)):
+        for transformation in transformations:
+            column_name = transformation['column']
+            report.check(column_name, transformation['type'], originals[column_name], df[column_name])
+    return df
 
-def convert_column(df, column_name, target_type, format=None):
+def convert_column(df, column_name, target_type, format=None, report=None):
     """
-    Converts a specified column to a given target type.
+    Converts a specified column to a given target type. With a report,
+    values that can't be converted are handled by its policy.
     
     Raises:
         ValueError: If the target type is unsupported.
         KeyError: If the specified column is not found.
+        ConversionError: If values could not be converted under the 'fail' policy.
+    """
+    return _convert_columns(df, [{'column': column_name, 'type': target_type, 'format': format}], report)
+
+def plan_transformations(transformations):
+    """
+    Groups transformations into stages in which every column is converted at
+    most once. Order is kept: a column that is converted again starts a new
+    stage, so each stage can run as one pass with a single null check.
+    
+    Raises:
+        ValueError: If a transformation has an unsupported target type.
+    """
+    stages = []
+    stage, columns = [], set()
+    for transformation in transformations:
+        if transformation['type'] not in SUPPORTED_TYPES:
+            raise ValueError(f"Unsupported target type: {transformation['type']}")
+        if transformation['column'] in columns:
+            stages.append(stage)
+            stage, columns = [], set()
+        stage.append(transformation)
+        columns.add(transformation['column'])
+    if stage:
+        stages.append(stage)
+    return stages
+
+def apply_transformations(df, transformations, report=None):
+    """
+    Applies a series of transformations to the DataFrame. With a report,
+    values that can't be converted are handled by its policy.
+    
+    Raises:
+        RuntimeError: If any transformation fails.
+        ConversionError: If values could not be converted under the 'fail' policy.
+    """
+    try:
+        with tracer.stage('apply_transformations', rows=len(df), transformations=len(transformations)):
+            for stage in plan_transformations(transformations):
+                df = _convert_columns(df, stage, report)
+        return df
+    except ConversionError as e:
+        raise ConversionError(f"Error applying transformations: {e}", e.errors)
+    except Exception as e:
+        raise RuntimeError(f"Error applying transformations: {e}")
+
+# Ways split_column can break a column apart
+SPLIT_METHODS = ('delimiter', 'fixed_width', 'regex', 'datetime')
+
+# Parts a datetime column can be split into
+DATETIME_PARTS = ('date', 'time', 'year', 'month', 'day', 'hour', 'minute', 'second')
+
+def _split_text(series, method, delimiter=None, widths=None, pattern=None, names=None):
+    """
+    Splits text values into a DataFrame of parts.
+
+    Raises:
+        ValueError: If the method or its parameters are invalid.
+    """
+    if method == 'delimiter':
+        if not delimiter:
+            raise ValueError("A delimiter is required")
+        # With names, everything after the last expected part stays in the last column
+        limit = len(names) - 1 if names else -1
+        return series.str.split(delimiter, n=limit, expand=True, regex=False)
+    if method == 'fixed_width':
+        if not widths or any(width < 1 for width in widths):
+            raise ValueError("Positive field widths are required")
+        text = series.astype(str).where(series.notna())
+        starts = [sum(widths[:index]) for index in range(len(widths))]
+        return pd.DataFrame({index: text.str.slice(start, start + width)
+                             for index, (start, width) in enumerate(zip(starts, widths))})
+    if method == 'regex':
+        if not pattern:
+            raise ValueError("A regex pattern with capture groups is required")
+        return series.str.extract(pattern, expand=True)
+    raise ValueError(f"Unsupported split method: {method}")
+
+def _split_series(series, method, delimiter=None, widths=None, pattern=None, parts=None, names=None, format=None):
+    """
+    Splits a series into a DataFrame of parts with vectorized string and
+    datetime accessors.
+
+    Raises:
+        ValueError: If the method or its parameters are invalid.
+    """
+    if method == 'datetime':
+        parts = parts or ['date', 'time']
+        unknown = [part for part in parts if part not in DATETIME_PARTS]
+        if unknown:
+            raise ValueError(f"Unsupported datetime parts: {', '.join(unknown)}")
+        parsed = _parse_datetimes(series, format)
+        columns = {}
+        for part in parts:
+            if part == 'date':
+                columns[part] = parsed.dt.normalize()
+            elif part == 'time':
+                columns[part] = parsed.dt.time
+            else:
+                columns[part] = getattr(parsed.dt, part)
+        return pd.DataFrame(columns)
+
+    # Codes repeat the same few values, so split each distinct value once
+    codes, uniques = pd.factorize(series)
+    if len(uniques) > UNIQUE_PARSE_RATIO * len(series):
+        return _split_text(series, method, delimiter, widths, pattern, names)
+    return _map_distinct(series, lambda values: _split_text(values, method, delimiter, widths, pattern, names),
+                         codes, uniques)
+
+def split_column(df, column_name, method, delimiter=None, widths=None, pattern=None, parts=None, names=None,
+                 format=None, keep_original=True):
+    """
+    Splits a column into new columns inserted right after it.
+    
+    Methods:
+        delimiter: splits on `delimiter`, e.g. product codes like 'AB-12-X'.
+        fixed_width: cuts pieces of the given `widths`, e.g. [2, 3].
+        regex: one column per capture group of `pattern`; named groups name the columns.
+        datetime: the datetime `parts` ('date', 'time', 'year', ...), date and time by
+            default. `format` describes the input, as for convert_column.
+    
+    New columns are called `names`, or '<column>_<n>' ('<column>_<part>' for
+    datetime splits) by default. Every one of `names` is created, with NaN
+    where values have fewer pieces, and one of them may be the split column
+    itself when `keep_original` is False. Returns the DataFrame and the
+    names of the new columns.
+    
+    Raises:
+        ValueError: If the method or its parameters are invalid.
+        KeyError: If the specified column is not found.
     """
     try:
         if column_name not in df.columns:
             raise KeyError(f"Column '{column_name}' not found in DataFrame")
-        
-        if target_type == 'datetime':
-            df[column_name] = pd.to_datetime(df[column_name], format=format, errors='coerce')
-        elif target_type == 'decimal':
-            df[column_name] = df[column_name].astype(float)
-        elif target_type == 'int':
-            df[column_name] = df[column_name].astype(int)
-        elif target_type == 'bool':
-            df[column_name] = df[column_name].astype(bool)
-        elif target_type == 'category':
-            df[column_name] = df[column_name].astype('category')
-        elif target_type == 'string':
-            df[column_name] = df[column_name].astype(str)
-        elif target_type == 'object':
-            df[column_name] = df[column_name].astype('object')
-        elif target_type == 'binary':
-            df[column_name] = df[column_name].apply(lambda x: x.encode())
+        with tracer.stage('split_column', rows=len(df), column=column_name, method=method):
+            pieces = _split_series(df[column_name], method, delimiter, widths, pattern, parts, names, format)
+        values = [pieces[piece] for piece in pieces.columns]
+        if names:
+            if len(names) < len(pieces.columns):
+                raise ValueError(f"Expected {len(pieces.columns)} column names, got {len(names)}")
+            new_names = list(names)
+            dtype = pieces.dtypes.iloc[0] if len(pieces.columns) else object
+            values += [pd.Series(index=df.index, dtype=dtype) for _ in range(len(names) - len(pieces.columns))]
+        elif method == 'datetime':
+            new_names = [f'{column_name}_{part}' for part in pieces.columns]
+        elif method == 'regex' and all(isinstance(group, str) for group in pieces.columns):
+            new_names = list(pieces.columns)
         else:
-            raise ValueError(f"Unsupported target type: {target_type}")
-        
-        # Warn if conversion leads to NaN/NaT
-        if df[column_name].isnull().any():
-            raise ValueError(f"Some values in column '{column_name}' could not be converted to {target_type} and were set to NaT/NaN.")
-        
-        return df
+            new_names = [f'{column_name}_{index + 1}' for index in range(len(pieces.columns))]
+        replaced = () if keep_original else (column_name,)
+        clashes = [name for name in new_names if name in df.columns and name not in replaced]
+        if clashes:
+            raise ValueError(f"Columns already exist: {', '.join(map(str, clashes))}")
+
+        position = df.columns.get_loc(column_name) + 1
+        if not keep_original:
+            df = df.drop(columns=column_name)
+            position -= 1
+        for offset, (name, piece) in enumerate(zip(new_names, values)):
+            df.insert(position + offset, name, piece)
+        return df, new_names
     except Exception as e:
-        raise RuntimeError(f"Error converting column '{column_name}' to {target_type}: {e}")
+        raise RuntimeError(f"Error splitting column '{column_name}' by {method}: {e}")
 
-def apply_transformations(df, transformations):
+def load_macro(macro_path):
     """
-    Applies a series of transformations to the DataFrame.
+    Loads a recorded macro (the JSON list of actions written by the app's
+    Save Recording) from disk.
     
     Raises:
-        RuntimeError: If any transformation fails.
+        FileNotFoundError: If the macro file does not exist.
+        ValueError: If the file is not a valid macro.
     """
     try:
-        for transformation in transformations:
-            df = convert_column(df, transformation['column'], transformation['type'], transformation.get('format'))
-        return df
-    except Exception as e:
-        raise RuntimeError(f"Error applying transformations: {e}")
+        with open(macro_path, 'r') as f:
+            actions = json.load(f)
+    except FileNotFoundError:
+        raise FileNotFoundError(f"Macro file not found: {macro_path}")
+    except json.JSONDecodeError as e:
+        raise ValueError(f"Invalid macro file '{macro_path}': {e}")
+    if not isinstance(actions, list) or not all(isinstance(a, dict) and 'action_type' in a for a in actions):
+        raise ValueError(f"Invalid macro file '{macro_path}': expected a list of recorded actions")
+    return actions
+
+def macro_digest(actions):
+    """Returns a stable digest of a list of macro actions."""
+    return hashlib.sha1(json.dumps(actions, sort_keys=True, default=str).encode('utf-8')).hexdigest()
+
+def apply_macro(df, actions, report=None):
+    """
+    Replays recorded macro actions on the DataFrame. With a report, values
+    that can't be converted are handled by its policy; quarantined rows are
+    removed at the end (see ValidationReport.partition).
+    
+    Raises:
+        ValueError: If an action type is not supported.
+        RuntimeError: If any action fails.
+    """
+    source = df.copy(deep=False)
+    for action in actions:
+        params = action.get('params', {})
+        if action['action_type'] == 'convert_column':
+            df = convert_column(df, params['column_name'], params['target_type'], params.get('format_spec'), report)
+        elif action['action_type'] == 'split_column':
+            df, _ = split_column(df, **params)
+        elif action['action_type'] == 'select_columns':
+            df = select_columns(df, params['columns'])
+        else:
+            raise ValueError(f"Unsupported macro action: {action['action_type']}")
+    return report.partition(source, df) if report is not None else df
+
+def select_columns(df, columns):
+    """
+    Keeps only the given columns, in the given order.
+    
+    Raises:
+        KeyError: If a column is not found.
+    """
+    missing = [column for column in columns if column not in df.columns]
+    if missing:
+        raise KeyError(f"Columns not found in DataFrame: {', '.join(map(str, missing))}")
+    return df[list(columns)]
 
 def map_columns(df, column_mapping):
     """
@@ -89,17 +632,207 @@ def map_columns(df, column_mapping):
 
 def export_data(df, output_path):
     """
-    Exports the DataFrame to a CSV or Excel file.
+    Exports the DataFrame to any format read_file supports. Parquet and
+    Feather keep datetime, category, bool and binary columns as they are,
+    so intermediate pipeline stages don't round-trip through text.
     
     Raises:
         ValueError: If the file format is unsupported.
     """
     try:
-        if output_path.endswith('.csv'):
-            df.to_csv(output_path, index=False)
-        elif output_path.endswith(('.xls', '.xlsx')):
-            df.to_excel(output_path, index=False)
-        else:
+        try:
+            format, compression = file_format(output_path)
+        except ValueError:
             raise ValueError("Unsupported output file format")
+        with tracer.stage('export_data', rows=len(df), path=output_path):
+            if format == 'csv':
+                df.to_csv(output_path, index=False, compression=compression)
+            elif format == 'excel':
+                df.to_excel(output_path, index=False)
+            elif format == 'parquet':
+                df.to_parquet(output_path, index=False)
+            elif format == 'feather':
+                # Feather only stores a default index
+                df.reset_index(drop=True).to_feather(output_path)
+            else:
+                df.to_json(output_path, orient='records', lines=True, date_format='iso', compression=compression)
     except Exception as e:
         raise RuntimeError(f"An error occurred while exporting data: {e}")
+
+def read_file_chunks(file_path, chunksize=DEFAULT_CHUNK_SIZE):
+    """
+    Reads a CSV file lazily, yielding DataFrames of at most `chunksize` rows.
+    
+    Raises:
+        ValueError: If the file is not a CSV file or the chunk size is invalid.
+        FileNotFoundError: If the file path does not exist.
+    """
+    if file_format(file_path)[0] != 'csv':
+        raise ValueError("Chunked reading is only supported for CSV files")
+    if chunksize < 1:
+        raise ValueError(f"Chunk size must be a positive number of rows, got {chunksize}")
+    try:
+        reader = pd.read_csv(file_path, chunksize=chunksize, compression=file_format(file_path)[1])
+    except FileNotFoundError:
+        raise FileNotFoundError(f"File not found: {file_path}")
+    except Exception as e:
+        raise RuntimeError(f"An error occurred while reading the file: {e}")
+    with reader:
+        for chunk in reader:
+            yield chunk
+
+def append_data(df, output_path, header=True):
+    """
+    Writes the DataFrame to a CSV file, appending when `header` is False.
+    
+    Raises:
+        ValueError: If the output file is not a CSV file.
+    """
+    if not output_path.endswith('.csv'):
+        raise ValueError("Incremental export is only supported for CSV files")
+    try:
+        with tracer.stage('append_data', rows=len(df), path=output_path):
+            df.to_csv(output_path, mode='w' if header else 'a', header=header, index=False)
+    except Exception as e:
+        raise RuntimeError(f"An error occurred while exporting data: {e}")
+
+def csv_datetime_formats(df, dates_only=True):
+    """
+    Returns {column: strftime format} for the datetime columns of a
+    DataFrame written to CSV in pieces. to_csv picks the format from the
+    values it is given, so without a fixed one a chunk of midnights comes
+    out as 2024-01-01 and the next as 2024-01-04 00:00:00. Like to_csv,
+    columns without a time of day get dates only, unless `dates_only` is
+    False (the formats are picked from a first chunk, later ones may have
+    times). Columns with time zones are left out, to_csv writes them the
+    same way in every chunk.
+    """
+    formats = {}
+    for column_name, series in df.items():
+        if not pd.api.types.is_datetime64_dtype(series):
+            continue
+        if series.dt.microsecond.any() or series.dt.nanosecond.any():
+            formats[column_name] = '%Y-%m-%d %H:%M:%S.%f'
+        elif dates_only and not (series.notna() & series.ne(series.dt.normalize())).any():
+            formats[column_name] = '%Y-%m-%d'
+        else:
+            formats[column_name] = '%Y-%m-%d %H:%M:%S'
+    return formats
+
+def format_datetimes(df, formats):
+    """Returns a shallow copy of the DataFrame with the given datetime columns formatted as text."""
+    df = df.copy(deep=False)
+    for column_name, format in formats.items():
+        if column_name in df.columns and pd.api.types.is_datetime64_dtype(df[column_name]):
+            df[column_name] = df[column_name].dt.strftime(format)
+    return df
+
+def _pin_datetime_formats(chunk, transformations):
+    """
+    Returns a copy of the transformations where every datetime conversion
+    without a format uses the format detected in this chunk, so that later
+    chunks are parsed the same way.
+    """
+    pinned = []
+    for transformation in transformations:
+        if (transformation['type'] in ('datetime', 'date', 'time') and not transformation.get('format')
+                and transformation['column'] in chunk.columns):
+            sample = chunk[transformation['column']].dropna()
+            if len(sample) and pd.api.types.is_string_dtype(sample):
+                detected = detect_datetime_format(sample.drop_duplicates().iloc[:FORMAT_SAMPLE_SIZE])
+                if detected:
+                    transformation = dict(transformation, format=detected)
+        pinned.append(transformation)
+    return pinned
+
+# Target types whose output is nullable in the streamed output, whatever the first chunk holds
+NULLABLE_TARGETS = {'int': 'Int64', 'unix': 'Int64', 'bool': 'boolean'}
+
+def _output_dtypes(chunk, transformations):
+    """
+    Returns the dtypes of the first converted chunk, for every column. Int
+    and bool columns (and int, unix and bool conversions, which come out as
+    float or object when a chunk has missing values) become nullable, so
+    every chunk is written as 5, not 5.0. Categories are left out, a later
+    chunk may have other ones.
+    """
+    targets = {transformation['column']: transformation['type'] for transformation in transformations}
+    dtypes = {}
+    for column_name, dtype in chunk.dtypes.items():
+        if isinstance(dtype, pd.CategoricalDtype):
+            continue
+        if targets.get(column_name) in NULLABLE_TARGETS:
+            dtype = NULLABLE_TARGETS[targets[column_name]]
+        elif pd.api.types.is_bool_dtype(dtype):
+            dtype = 'boolean'
+        elif pd.api.types.is_integer_dtype(dtype):
+            dtype = 'Int64'
+        dtypes[column_name] = dtype
+    return dtypes
+
+def _output_datetime_formats(chunk, transformations):
+    """
+    Returns the CSV formats of the datetime columns of the first converted
+    chunk (see csv_datetime_formats). Dates only are kept for 'date'
+    conversions; for others a later chunk may have a time of day.
+    """
+    formats = csv_datetime_formats(chunk, dates_only=False)
+    for transformation in transformations:
+        if transformation['type'] == 'date' and transformation['column'] in formats:
+            formats[transformation['column']] = '%Y-%m-%d'
+    return formats
+
+def _cast_chunk(chunk, dtypes):
+    """
+    Casts a converted chunk's columns to the dtypes of the first one, so
+    every chunk is written the same way instead of being inferred again.
+    """
+    for column_name, dtype in dtypes.items():
+        if column_name in chunk.columns and chunk[column_name].dtype != dtype:
+            try:
+                chunk[column_name] = chunk[column_name].astype(dtype)
+            except (TypeError, ValueError):
+                pass  # Values the first chunk's dtype can't hold, e.g. fractions in an int column
+    return chunk
+
+def stream_transformations(input_path, output_path, transformations, chunksize=DEFAULT_CHUNK_SIZE):
+    """
+    Reads a CSV file in chunks, applies the transformations to each chunk and
+    appends it to the output CSV file, so memory use is bounded by the chunk
+    size rather than the file size. The dtypes and datetime formats of the
+    first converted chunk are kept for the others, so a column is written
+    the same way throughout. Returns the number of rows written.
+    
+    Raises:
+        ValueError: If the input or output file is not a CSV file.
+        RuntimeError: If reading, a transformation or writing fails.
+    """
+    if not output_path.endswith('.csv'):
+        raise ValueError("Incremental export is only supported for CSV files")
+    # Chunks go to a temporary file that replaces the output once all of them succeeded
+    directory, name = os.path.split(output_path)
+    temporary = os.path.join(directory, '.tmp-' + name)
+    rows = 0
+    chunks = 0
+    try:
+        for chunk in read_file_chunks(input_path, chunksize):
+            if chunks == 0:
+                transformations = _pin_datetime_formats(chunk, transformations)
+            chunk = apply_transformations(chunk, transformations)
+            if chunks == 0:
+                dtypes = _output_dtypes(chunk, transformations)
+                formats = _output_datetime_formats(chunk, transformations)
+            chunk = format_datetimes(_cast_chunk(chunk, dtypes), formats)
+            append_data(chunk, temporary, header=(chunks == 0))
+            chunks += 1
+            rows += len(chunk)
+        if chunks == 0:
+            # Empty input: still produce an output file with the header row
+            header = pd.read_csv(input_path, nrows=0, compression=file_format(input_path)[1])
+            append_data(header, temporary)
+    except BaseException:
+        if os.path.exists(temporary):
+            os.remove(temporary)
+        raise
+    os.replace(temporary, output_path)
+    return rows
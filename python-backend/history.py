@@ -0,0 +1,88 @@
+from collections import deque
+
+# Default memory budget for the undo history (bytes)
+DEFAULT_HISTORY_BUDGET = 512 * 1024 * 1024
+
+class ColumnHistory:
+    """
+    Undo/redo history that stores column-level deltas instead of copies of
+    the whole DataFrame.
+
+    Before a change, record() keeps a reference to the columns the change is
+    about to replace. Conversions assign new column objects and never modify
+    the old ones, so the saved columns share their buffers with nothing but
+    the history. Undo swaps them back in and saves the replaced columns for
+    redo, so both directions cost O(changed columns). The oldest undo steps
+    are dropped when the saved columns exceed the memory budget.
+    """
+
+    def __init__(self, budget=DEFAULT_HISTORY_BUDGET):
+        self.budget = budget
+        self.undo_stack = deque()
+        self.redo_stack = []
+        self.memory_usage = 0
+
+    def __bool__(self):
+        return bool(self.undo_stack or self.redo_stack)
+
+    @property
+    def can_undo(self):
+        return bool(self.undo_stack)
+
+    @property
+    def can_redo(self):
+        return bool(self.redo_stack)
+
+    def clear(self):
+        """Forgets all history, e.g. when a different file is loaded."""
+        self.undo_stack.clear()
+        self.redo_stack.clear()
+        self.memory_usage = 0
+
+    def record(self, df, columns):
+        """
+        Saves the current state of `columns` before they are changed. Columns
+        that don't exist yet are recorded as absent, so undo removes them.
+        """
+        self._push(self.undo_stack, self._snapshot(df, columns))
+        for entry in self.redo_stack:
+            self.memory_usage -= entry['size']
+        self.redo_stack.clear()
+        self._evict()
+
+    def undo(self, df):
+        """Returns the DataFrame with the last recorded change reverted."""
+        return self._swap(df, self.undo_stack, self.redo_stack)
+
+    def redo(self, df):
+        """Returns the DataFrame with the last undone change reapplied."""
+        return self._swap(df, self.redo_stack, self.undo_stack)
+
+    def _snapshot(self, df, columns):
+        saved = {column: (df[column] if column in df.columns else None) for column in columns}
+        size = sum(int(series.memory_usage(index=False, deep=True))
+                   for series in saved.values() if series is not None)
+        return {'columns': saved, 'order': list(df.columns), 'size': size}
+
+    def _push(self, stack, entry):
+        stack.append(entry)
+        self.memory_usage += entry['size']
+
+    def _swap(self, df, source, target):
+        if not source:
+            return df
+        entry = source.pop()
+        self.memory_usage -= entry['size']
+        self._push(target, self._snapshot(df, entry['columns']))
+        for column, series in entry['columns'].items():
+            if series is None:
+                df = df.drop(columns=column)
+            else:
+                df[column] = series
+        return df[entry['order']] if list(df.columns) != entry['order'] else df
+
+    def _evict(self):
+        # Keep at least the most recent step so a single large change can
+        # still be undone
+        while self.memory_usage > self.budget and len(self.undo_stack) > 1:
+            self.memory_usage -= self.undo_stack.popleft()['size']
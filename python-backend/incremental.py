@@ -0,0 +1,318 @@
+"""
+Incremental re-migration: replays a macro on a source file that was
+migrated before, converting only the rows that are new or changed since.
+
+Next to every output a manifest records a content hash of each source row
+(in output order), a digest of the macro and a signature of the output file.
+On the next run each source row is hashed again: rows whose hash is in the
+manifest reuse their previous output, and only the rest go through the
+macro. CSV and JSON Lines outputs are merged as text, so reused rows are
+neither parsed nor serialized again; other formats reload the previous typed
+output and skip only the conversion. Anything that makes the previous output
+untrustworthy (another macro, other source columns, an output edited since)
+falls back to a full run.
+
+pandas formats some columns as a whole: a CSV datetime column is written
+as dates only when no row has a time of day, and an int conversion with
+missing values comes out as float (3.0). The manifest keeps, per such
+column, a bitmap of the rows that decide this, so a text merge writes the
+changed rows exactly like a full run would, or falls back to one when the
+decision flips. Compressed text outputs always run in full.
+"""
+import io
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+from functions import (
+    read_file, read_header, export_data, file_format, macro_digest, detect_datetime_format, FORMAT_SAMPLE_SIZE
+)
+from compiler import cached_plan
+
+# Appended to the output path to name its manifest
+MANIFEST_SUFFIX = '.manifest.pkl'
+
+# Bumped whenever the manifest layout changes, older manifests force a full run
+MANIFEST_VERSION = 2
+
+def manifest_path_for(output_path):
+    return output_path + MANIFEST_SUFFIX
+
+def row_hashes(df):
+    """Returns one 64-bit content hash per row, independent of the index."""
+    return pd.util.hash_pandas_object(df, index=False).to_numpy()
+
+def pin_formats(df, actions):
+    """
+    Returns the actions with every undetermined datetime input format
+    detected once from the full source column. Converting a handful of
+    changed rows then parses them exactly like the full run did.
+    """
+    pinned = []
+    for action in actions:
+        params = dict(action.get('params', {}))
+        column = params.get('column_name')
+        if action['action_type'] == 'convert_column':
+            key = 'format_spec'
+            wanted = params.get('target_type') in ('datetime', 'date', 'time')
+        else:
+            key = 'format'
+            wanted = action['action_type'] == 'split_column' and params.get('method') == 'datetime'
+        if (wanted and params.get(key) is None and column in df.columns
+                and pd.api.types.is_string_dtype(df[column])):
+            params[key] = detect_datetime_format(df[column].dropna().unique()[:FORMAT_SAMPLE_SIZE])
+        pinned.append({**action, 'params': params})
+    return pinned
+
+def load_manifest(output_path):
+    """Returns the manifest of a previous run, or None if there is no usable one."""
+    try:
+        manifest = pd.read_pickle(manifest_path_for(output_path))
+    except Exception:
+        return None  # A missing or corrupt manifest just means a full run
+    if not isinstance(manifest, dict) or manifest.get('version') != MANIFEST_VERSION:
+        return None
+    return manifest
+
+def _output_signature(output_path):
+    stat = os.stat(output_path)
+    return (stat.st_mtime_ns, stat.st_size)
+
+def _save_manifest(output_path, manifest):
+    manifest['output_signature'] = _output_signature(output_path)
+    path = manifest_path_for(output_path)
+    pd.to_pickle(manifest, path + '.tmp')
+    os.replace(path + '.tmp', path)
+
+def _temporary_path(output_path):
+    # Same directory and extension, so the final rename is atomic and export_data picks the same format
+    directory, name = os.path.split(output_path)
+    return os.path.join(directory, '.tmp-' + name)
+
+def previous_positions(previous_hashes, hashes):
+    """
+    Returns the position of each row in the previous output, or -1 for rows
+    that are new or changed. Identical rows all reuse the first copy.
+    """
+    previous = pd.Index(previous_hashes)
+    first = np.flatnonzero(~previous.duplicated())
+    indexer = previous[first].get_indexer(hashes)
+    return np.where(indexer >= 0, first[indexer], -1)
+
+def _is_reusable(manifest, output_path, digest, columns):
+    if manifest is None or manifest['macro'] != digest or manifest['columns'] != columns:
+        return False
+    try:
+        return _output_signature(output_path) == manifest['output_signature']
+    except OSError:
+        return False
+
+# --------------- Text Layout ---------------
+def _rows_with_time(series):
+    return (series.notna() & series.ne(series.dt.normalize())).to_numpy()
+
+def text_layout(df, format):
+    """
+    Returns, per column whose text depends on the whole column, its kind and
+    the rows that decide it: ('datetime', rows with a time of day) for CSV
+    datetime columns, ('float', missing rows) for float columns, or
+    'unsupported' for CSV datetimes a merge can't reproduce (time zones,
+    fractions of a second).
+    """
+    layout = {}
+    for column in df.columns:
+        series = df[column]
+        if format == 'csv' and isinstance(series.dtype, pd.DatetimeTZDtype):
+            layout[str(column)] = 'unsupported'
+        elif format == 'csv' and pd.api.types.is_datetime64_dtype(series):
+            if (series.dt.microsecond.any() or series.dt.nanosecond.any()):
+                layout[str(column)] = 'unsupported'
+            else:
+                layout[str(column)] = ('datetime', np.packbits(_rows_with_time(series)))
+        elif pd.api.types.is_float_dtype(series):
+            layout[str(column)] = ('float', np.packbits(series.isna().to_numpy()))
+    return layout
+
+def _align_changed(changed, manifest, reused):
+    """
+    Prepares the changed rows so that serializing them on their own gives
+    the text a full run would write. Returns the rows and the merged layout,
+    or None when the merge can't match a full run (the caller then runs in
+    full).
+    """
+    rows = len(manifest['hashes'])
+    keep = reused >= 0
+    previous_rows = reused[keep]
+    changed = changed.copy(deep=False)
+    layout = {}
+    for column, dtype in zip(changed.columns, manifest['dtypes']):
+        entry = manifest['layout'].get(str(column))
+        if entry == 'unsupported':
+            return None
+        series = changed[column]
+        if str(series.dtype) != dtype:
+            # An int conversion comes out as float when the whole column has missing values
+            if not (entry is not None and entry[0] == 'float' and pd.api.types.is_integer_dtype(series)):
+                return None
+            series = changed[column] = series.astype(dtype)
+        if entry is None:
+            continue
+        kind, bitmap = entry
+        marked = np.unpackbits(bitmap, count=rows).view(bool)
+        merged = np.empty(len(reused), dtype=bool)
+        merged[keep] = marked[previous_rows]
+        merged[~keep] = series.isna().to_numpy() if kind == 'float' else _rows_with_time(series)
+        if kind == 'float':
+            # Once no row is missing, a full run could write an int conversion as ints
+            if marked.any() and not merged.any():
+                return None
+        elif merged.any() != marked.any():
+            return None  # A full run would switch between dates only and date and time
+        else:
+            changed[column] = series.dt.strftime('%Y-%m-%d %H:%M:%S' if marked.any() else '%Y-%m-%d')
+        layout[str(column)] = (kind, np.packbits(merged))
+    return changed, layout
+
+# --------------- Text Merge (CSV, JSON Lines) ---------------
+def _line_separator(format):
+    # Must match how export_data writes the format
+    return '\n' if format == 'jsonl' else os.linesep
+
+def _serialize_lines(df, format):
+    """Serializes rows like export_data does. Returns (header or None, row lines)."""
+    buffer = io.StringIO()
+    if format == 'csv':
+        df.to_csv(buffer, index=False)
+    else:
+        df.to_json(buffer, orient='records', lines=True, date_format='iso')
+    lines = buffer.getvalue().split(_line_separator(format))[:-1]
+    if format == 'csv':
+        return lines[0], lines[1:]
+    return None, lines
+
+def _merge_text(output_path, format, reused, changed, manifest):
+    """
+    Writes the output from the previous output's lines and the changed rows.
+    Returns the new text layout, or None when the merge can't match a full
+    run (see _align_changed) or the lines can't be matched to rows (e.g.
+    values that contain line breaks), so the caller falls back to a full run.
+    """
+    aligned = _align_changed(changed, manifest, reused)
+    if aligned is None:
+        return None
+    changed, layout = aligned
+    manifest_rows = len(manifest['hashes'])
+    separator = _line_separator(format)
+    with open(output_path, 'r', encoding='utf-8', newline='') as f:
+        previous = f.read().split(separator)[:-1]
+    header = previous.pop(0) if format == 'csv' and previous else None
+    if len(previous) != manifest_rows:
+        return None
+    changed_header, changed_lines = _serialize_lines(changed, format) if len(changed) else (header, [])
+    if len(changed_lines) != len(changed) or changed_header != header:
+        return None
+
+    lines = [header] if header is not None else []
+    changed_lines = iter(changed_lines)
+    lines.extend(previous[position] if position >= 0 else next(changed_lines) for position in reused)
+    temporary = _temporary_path(output_path)
+    with open(temporary, 'w', encoding='utf-8', newline='') as f:
+        f.write(''.join(line + separator for line in lines))
+    os.replace(temporary, output_path)
+    return layout
+
+# --------------- Typed Merge (Parquet, Feather, Excel, compressed) ---------------
+def _concat_rows(previous, changed):
+    """Concatenates rows, merging category levels instead of falling back to object."""
+    combined = pd.concat([previous, changed], ignore_index=True)
+    for column in combined.columns:
+        if (isinstance(previous[column].dtype, pd.CategoricalDtype)
+                and isinstance(changed[column].dtype, pd.CategoricalDtype)):
+            combined[column] = pd.api.types.union_categoricals(
+                [previous[column], changed[column]], ignore_order=True)
+    return combined
+
+def _merge_typed(output_path, reused, changed):
+    """Writes the output from the previous typed output and the changed rows. Returns False on a mismatch."""
+    previous = read_file(output_path, use_cache=False)
+    if len(changed) and list(previous.columns) != list(changed.columns):
+        return False
+    keep = reused >= 0
+    combined = previous.iloc[reused[keep]].reset_index(drop=True)
+    if len(changed):
+        combined = _concat_rows(combined, changed.reset_index(drop=True))
+    # Rows were stacked reused first, changed second; restore the source order
+    order = np.empty(len(reused), dtype=np.int64)
+    order[keep] = np.arange(keep.sum())
+    order[~keep] = keep.sum() + np.arange((~keep).sum())
+    temporary = _temporary_path(output_path)
+    export_data(combined.iloc[order].reset_index(drop=True), temporary)
+    os.replace(temporary, output_path)
+    return True
+
+def migrate_incremental(input_path, output_path, actions):
+    """
+    Replays macro actions on a file, converting only rows that are new or
+    changed since the previous run into `output_path`. Never raises; like
+    bulk.migrate_file it reports failures in the returned result, which also
+    counts the reused and converted rows.
+    """
+    start = time.perf_counter()
+    result = {'input': input_path, 'output': output_path, 'rows': 0, 'reused': 0, 'converted': 0}
+    try:
+        # Validates the macro before reading, and hashes only the columns it needs
+        header = read_header(input_path)
+        source = read_file(input_path, use_cache=False, columns=cached_plan(actions, header).columns)
+        hashes = row_hashes(source)
+        digest = macro_digest(actions)
+        columns = [str(column) for column in source.columns]
+        manifest = load_manifest(output_path)
+        if not _is_reusable(manifest, output_path, digest, columns):
+            manifest = None
+
+        format, compression = file_format(output_path)
+        text = format in ('csv', 'jsonl')
+        if text and compression:
+            manifest = None  # Compressed text can't be merged line by line
+        merged = False
+        if manifest is not None:
+            reused = previous_positions(manifest['hashes'], hashes)
+            pinned = manifest['actions']
+            changed = source.iloc[np.flatnonzero(reused < 0)]
+            if len(changed):
+                changed = cached_plan(pinned, header).run(changed.reset_index(drop=True))
+            unchanged = len(reused) == len(manifest['hashes']) and (reused == np.arange(len(reused))).all()
+            layout, dtypes = manifest['layout'], manifest['dtypes']
+            if unchanged:
+                merged = True  # Nothing to write
+            elif text:
+                layout = _merge_text(output_path, format, reused, changed, manifest)
+                merged = layout is not None
+            else:
+                merged = _merge_typed(output_path, reused, changed)
+            if merged:
+                result.update(reused=int((reused >= 0).sum()), converted=len(changed))
+        if not merged:
+            pinned = pin_formats(source, actions)
+            output = cached_plan(pinned, header).run(source)
+            export_data(output, output_path)
+            layout = text_layout(output, format) if text else {}
+            dtypes = [str(dtype) for dtype in output.dtypes]
+            result.update(converted=len(source))
+
+        _save_manifest(output_path, {
+            'version': MANIFEST_VERSION,
+            'macro': digest,
+            'columns': columns,
+            'actions': pinned,
+            'hashes': hashes,
+            'dtypes': dtypes,
+            'layout': layout,
+        })
+        result.update(status='ok', rows=len(source), mode='incremental' if merged else 'full')
+    except Exception as e:
+        result.update(status='error', error=str(e))
+    result['seconds'] = time.perf_counter() - start
+    return result
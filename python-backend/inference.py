@@ -0,0 +1,141 @@
+import numpy as np
+import pandas as pd
+
+from functions import read_file_chunks, detect_datetime_format, BOOL_VALUES, DEFAULT_CHUNK_SIZE
+
+# Rows looked at per column; inference cost doesn't grow with the file size
+DEFAULT_SAMPLE_SIZE = 1000
+
+# A text column is a category when its sample has at most this many
+# distinct values and they make up at most this share of the sample
+MAX_CATEGORY_LEVELS = 100
+MAX_CATEGORY_RATIO = 0.5
+
+# Words that make a text column boolean; 0/1 columns are detected as int
+BOOL_WORDS = {value for value in BOOL_VALUES if not value.isdigit()}
+
+INT_PATTERN = r'[+-]?\d+'
+
+# Codes such as '007' or '0123', whose leading zeros a number would lose
+LEADING_ZERO_PATTERN = r'[+-]?0\d.*'
+
+def sample_column(series, sample_size=DEFAULT_SAMPLE_SIZE, seed=0):
+    """
+    Returns the non-null values of a uniform random sample of at most
+    `sample_size` rows, picked by position so the column is never scanned.
+    """
+    if len(series) > sample_size:
+        positions = np.random.default_rng(seed).choice(len(series), size=sample_size, replace=False)
+        series = series.iloc[np.sort(positions)]
+    return series.dropna()
+
+def reservoir_sample(chunks, sample_size=DEFAULT_SAMPLE_SIZE, seed=0):
+    """
+    Draws a uniform sample of at most `sample_size` rows from an iterable of
+    DataFrame chunks (reservoir sampling), holding no more than one chunk
+    and the sample in memory.
+    """
+    rng = np.random.default_rng(seed)
+    reservoir = None
+    seen = 0
+    for chunk in chunks:
+        chunk = chunk.reset_index(drop=True)
+        if reservoir is None:
+            reservoir = chunk.iloc[:0]
+        free = sample_size - len(reservoir)
+        if free > 0:
+            reservoir = pd.concat([reservoir, chunk.iloc[:free]], ignore_index=True)
+            seen += min(free, len(chunk))
+            chunk = chunk.iloc[free:]
+        if len(chunk):
+            # Row number i (1-based) replaces slot j when j < sample_size,
+            # with j uniform in [0, i); later rows win when slots collide
+            slots = rng.integers(0, np.arange(seen + 1, seen + len(chunk) + 1))
+            seen += len(chunk)
+            chosen = pd.Series(np.arange(len(chunk)), index=slots)[slots < sample_size]
+            chosen = chosen.groupby(level=0).last()
+            if len(chosen):
+                replacement = chunk.iloc[chosen.to_numpy()].set_axis(chosen.index)
+                reservoir = pd.concat([reservoir.drop(index=chosen.index), replacement]).sort_index()
+    return reservoir if reservoir is not None else pd.DataFrame()
+
+def infer_column_type(series, sample_size=DEFAULT_SAMPLE_SIZE, seed=0):
+    """
+    Infers the target type (and datetime format) of a column from a sample.
+    Returns a (type, format) tuple using convert_column's type names.
+    """
+    if pd.api.types.is_bool_dtype(series):
+        return 'bool', None
+    if pd.api.types.is_datetime64_any_dtype(series):
+        return 'datetime', None
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        return 'category', None
+    if pd.api.types.is_integer_dtype(series):
+        return 'int', None
+    if pd.api.types.is_float_dtype(series):
+        # Whole numbers stored as floats, only if there are no nulls to keep
+        values = sample_column(series, sample_size, seed)
+        if len(values) and (values % 1 == 0).all() and not series.hasnans:
+            return 'int', None
+        return 'decimal', None
+
+    values = sample_column(series, sample_size, seed)
+    if not len(values) or not all(isinstance(value, str) for value in values):
+        return 'object', None
+    text = values.str.strip()
+    lowered = text.str.lower()
+    if lowered.isin(BOOL_WORDS).all():
+        return 'bool', None
+    codes = text.str.fullmatch(LEADING_ZERO_PATTERN).any()
+    if not codes and text.str.fullmatch(INT_PATTERN).all():
+        return 'int', None
+    if not codes and pd.to_numeric(text, errors='coerce').notna().all():
+        return 'decimal', None
+    datetime_format = detect_datetime_format(text)
+    if datetime_format:
+        return 'datetime', datetime_format
+    distinct = text.nunique()
+    if distinct <= MAX_CATEGORY_LEVELS and distinct <= MAX_CATEGORY_RATIO * len(text):
+        return 'category', None
+    return 'string', None
+
+def infer_types(df, sample_size=DEFAULT_SAMPLE_SIZE, seed=0):
+    """Returns {column: (type, format)} for every column of the DataFrame."""
+    return {column: infer_column_type(df[column], sample_size, seed) for column in df.columns}
+
+def to_transformations(types, df=None):
+    """
+    Turns inferred types into a transformation list for apply_transformations.
+    With `df`, columns that already have the inferred type are left out.
+    """
+    transformations = []
+    for column, (target_type, datetime_format) in types.items():
+        if df is not None and _has_type(df[column], target_type):
+            continue
+        transformations.append({'column': column, 'type': target_type, 'format': datetime_format})
+    return transformations
+
+def infer_transformations(df, sample_size=DEFAULT_SAMPLE_SIZE, seed=0):
+    """Infers the transformations that give each column of the DataFrame its detected type."""
+    return to_transformations(infer_types(df, sample_size, seed), df)
+
+def infer_file_transformations(file_path, sample_size=DEFAULT_SAMPLE_SIZE, seed=0):
+    """
+    Infers transformations for a CSV file from a reservoir sample, without
+    loading the whole file.
+    """
+    sample = reservoir_sample(read_file_chunks(file_path, DEFAULT_CHUNK_SIZE), sample_size, seed)
+    return to_transformations(infer_types(sample, sample_size, seed), sample)
+
+def _has_type(series, target_type):
+    if target_type == 'datetime':
+        return pd.api.types.is_datetime64_any_dtype(series)
+    if target_type == 'int':
+        return pd.api.types.is_integer_dtype(series)
+    if target_type == 'decimal':
+        return pd.api.types.is_float_dtype(series)
+    if target_type == 'bool':
+        return pd.api.types.is_bool_dtype(series)
+    if target_type == 'category':
+        return isinstance(series.dtype, pd.CategoricalDtype)
+    return target_type in ('string', 'object')  # Text columns are left as they are
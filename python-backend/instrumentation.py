@@ -0,0 +1,219 @@
+"""
+Lightweight instrumentation for the migration core.
+
+Code under measurement wraps its stages in `tracer.stage(...)`:
+
+    with tracer.stage('read_file', path=file_path) as stage:
+        df = ...
+        stage.rows = len(df)
+
+When tracing is on, every stage becomes an event with its wall time, rows,
+rows per second and the process's peak RSS, logged as a JSON line on the
+'fastmig.trace' logger and kept for summary() and the Chrome trace file
+(chrome://tracing, Perfetto). Only the latest MAX_EVENTS events are kept,
+so a long-running process that traces (the server, the app) doesn't grow. When it is off, stage() returns a shared no-op
+object, so the cost is a single attribute check per stage.
+
+Tracing is off unless FASTMIG_TRACE is set (e.g. FASTMIG_TRACE=1), or
+enabled from cli.py --trace or the app's performance panel.
+"""
+import json
+import logging
+import os
+import sys
+import threading
+import time
+from collections import deque
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+# Enables tracing for the whole process when set to anything but '' or '0'
+TRACE_ENV = 'FASTMIG_TRACE'
+
+# Events kept in memory; older ones are dropped (the log keeps them all)
+MAX_EVENTS = 10000
+
+logger = logging.getLogger('fastmig.trace')
+
+def peak_rss():
+    """Returns the peak resident set size of the process in bytes, or None if unknown."""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == 'darwin' else peak * 1024  # Linux reports KiB
+
+class _NullStage:
+    """Stands in for a Stage while tracing is off; attribute writes are ignored."""
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+    def __setattr__(self, name, value):
+        pass
+
+_NULL_STAGE = _NullStage()
+
+class Stage:
+    """One timed stage. Set `rows` inside the block when it isn't known up front."""
+    __slots__ = ('tracer', 'name', 'rows', 'args', 'start', 'timestamp')
+
+    def __init__(self, tracer, name, rows, args):
+        self.tracer = tracer
+        self.name = name
+        self.rows = rows
+        self.args = args
+
+    def __enter__(self):
+        self.timestamp = time.time()  # Wall clock, comparable across worker processes
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, traceback):
+        seconds = time.perf_counter() - self.start
+        event = {
+            'name': self.name,
+            'start': self.timestamp,
+            'seconds': seconds,
+            'rows': self.rows,
+            'rows_per_second': self.rows / seconds if self.rows is not None and seconds else None,
+            'peak_rss_bytes': peak_rss(),
+            'pid': os.getpid(),
+            'tid': threading.get_ident(),
+            'args': self.args,
+        }
+        if exc_type is not None:
+            event['error'] = exc_type.__name__
+        self.tracer.record(event)
+        return False
+
+class Tracer:
+    """
+    Collects the latest `max_events` stage events. Thread safe; jobs record
+    from worker threads.
+    """
+
+    def __init__(self, enabled=False, max_events=MAX_EVENTS):
+        self.enabled = enabled
+        self.events = deque(maxlen=max_events)
+        self._recorded = 0  # Events recorded and not taken, including dropped ones
+        self._lock = threading.Lock()
+
+    def enable(self):
+        self.enabled = True
+
+    def disable(self):
+        self.enabled = False
+
+    def clear(self):
+        with self._lock:
+            self.events.clear()
+            self._recorded = 0
+
+    def stage(self, name, rows=None, **args):
+        """Returns a context manager that times one stage, or a no-op one when tracing is off."""
+        if not self.enabled:
+            return _NULL_STAGE
+        return Stage(self, name, rows, args)
+
+    def record(self, event):
+        with self._lock:
+            self.events.append(event)
+            self._recorded += 1
+        if logger.isEnabledFor(logging.INFO):
+            logger.info(json.dumps(event, default=str))
+
+    def mark(self):
+        """Returns a position to collect the events recorded after it with take_since."""
+        return self._recorded
+
+    def take_since(self, mark):
+        """Removes and returns the events recorded after `mark` that are still kept."""
+        with self._lock:
+            count = max(min(self._recorded - mark, len(self.events)), 0)
+            events = [self.events.pop() for _ in range(count)][::-1]
+            self._recorded -= count
+        return events
+
+    def extend(self, events):
+        """Adds events recorded elsewhere, e.g. in a worker process."""
+        with self._lock:
+            self.events.extend(events)
+            self._recorded += len(events)
+
+    # --------------- Reports ---------------
+    def summary(self):
+        """
+        Aggregates the events per stage name, and conversions per column.
+        Returns {'stages': {name: totals}, 'columns': {column: totals},
+        'peak_rss_bytes': peak}.
+        """
+        stages, columns = {}, {}
+        with self._lock:
+            events = list(self.events)
+        for event in events:
+            totals = [stages.setdefault(event['name'], {'count': 0, 'seconds': 0.0, 'rows': 0})]
+            if event['name'] == 'convert_column':
+                column = str(event['args'].get('column'))
+                totals.append(columns.setdefault(column, {'count': 0, 'seconds': 0.0, 'rows': 0,
+                                                          'type': event['args'].get('type')}))
+            for total in totals:
+                total['count'] += 1
+                total['seconds'] += event['seconds']
+                total['rows'] += event['rows'] or 0
+        for total in list(stages.values()) + list(columns.values()):
+            total['rows_per_second'] = total['rows'] / total['seconds'] if total['seconds'] else None
+        peaks = [event['peak_rss_bytes'] for event in events if event['peak_rss_bytes'] is not None]
+        return {'stages': stages, 'columns': columns, 'peak_rss_bytes': max(peaks) if peaks else None}
+
+    def format_summary(self):
+        """Returns the summary as a plain text table."""
+        summary = self.summary()
+        lines = [f"{'stage':24} {'calls':>6} {'seconds':>10} {'rows/s':>14}"]
+        for name, total in sorted(summary['stages'].items(), key=lambda item: -item[1]['seconds']):
+            rate = f"{total['rows_per_second']:,.0f}" if total['rows_per_second'] else '-'
+            lines.append(f"{name:24} {total['count']:6} {total['seconds']:10.4f} {rate:>14}")
+        if summary['columns']:
+            lines.append('')
+            lines.append(f"{'column':24} {'type':>10} {'seconds':>10} {'rows/s':>14}")
+            for column, total in sorted(summary['columns'].items(), key=lambda item: -item[1]['seconds']):
+                rate = f"{total['rows_per_second']:,.0f}" if total['rows_per_second'] else '-'
+                lines.append(f"{column[:24]:24} {str(total['type']):>10} {total['seconds']:10.4f} {rate:>14}")
+        if summary['peak_rss_bytes']:
+            lines.append('')
+            lines.append(f"peak RSS {summary['peak_rss_bytes'] / 2**20:,.1f} MiB")
+        return '\n'.join(lines)
+
+    def write_chrome_trace(self, path):
+        """Writes the events in the Chrome trace event format."""
+        with self._lock:
+            events = list(self.events)
+        origin = min((event['start'] for event in events), default=0)
+        trace = []
+        for event in events:
+            args = dict(event['args'])
+            args.update(rows=event['rows'], rows_per_second=event['rows_per_second'],
+                        peak_rss_bytes=event['peak_rss_bytes'])
+            if 'error' in event:
+                args['error'] = event['error']
+            trace.append({
+                'name': event['name'],
+                'cat': 'fastmig',
+                'ph': 'X',
+                'ts': (event['start'] - origin) * 1e6,
+                'dur': event['seconds'] * 1e6,
+                'pid': event['pid'],
+                'tid': event['tid'],
+                'args': args,
+            })
+        with open(path, 'w') as f:
+            json.dump({'traceEvents': trace, 'displayTimeUnit': 'ms'}, f, default=str)
+
+# Tracer shared by the migration core, the CLI and the app
+tracer = Tracer(enabled=os.environ.get(TRACE_ENV, '') not in ('', '0'))
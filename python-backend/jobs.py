@@ -0,0 +1,138 @@
+"""
+Background jobs shared by the app (workers.py) and the HTTP service
+(server.py).
+
+Jobs are plain functions that take `progress` (called with the number of
+rows handled so far) and `is_cancelled` (polled between chunks) keyword
+arguments. They never touch Qt, so they can also run without a GUI.
+"""
+import os
+
+import pandas as pd
+
+from cache import file_cache
+from functions import (
+    read_file, read_file_chunks, convert_column, split_column, apply_transformations, export_data,
+    append_data, file_format, csv_datetime_formats, format_datetimes, DEFAULT_CHUNK_SIZE
+)
+from inference import infer_transformations
+from compiler import plan_for_file
+from workbook import export_sheet
+from compact import read_file_compact
+
+class JobCancelled(Exception):
+    """Raised inside a job when the user cancelled it."""
+
+def load_job(file_path, progress, is_cancelled, sheet_name=None):
+    """
+    Reads a file, in chunks for CSV so progress and cancellation are
+    reported. Files already in the shared cache are returned immediately.
+    `sheet_name` picks a sheet of an Excel workbook other than the first.
+    """
+    if sheet_name is not None:
+        df = read_file(file_path, sheet_name=sheet_name)
+        progress(len(df))
+        return df
+    df = file_cache.get(file_path)
+    if df is not None or file_format(file_path)[0] != 'csv':
+        df = df if df is not None else read_file(file_path)
+        progress(len(df))
+        return df
+    chunks, rows = [], 0
+    for chunk in read_file_chunks(file_path, DEFAULT_CHUNK_SIZE):
+        if is_cancelled():
+            raise JobCancelled()
+        chunks.append(chunk)
+        rows += len(chunk)
+        progress(rows)
+    if not chunks:
+        return read_file(file_path)
+    df = pd.concat(chunks, ignore_index=True)
+    file_cache.put(file_path, df)
+    return df.copy(deep=False)
+
+def compact_load_job(file_path, progress, is_cancelled):
+    """
+    Reads a file with compact column types (see compact.py). Returns the
+    DataFrame and the bytes-saved report.
+    """
+    df, report = read_file_compact(file_path)
+    progress(len(df))
+    return df, report
+
+def convert_job(df, column_name, target_type, format, progress, is_cancelled):
+    """
+    Converts one column of an already loaded DataFrame. The conversion runs
+    on a shallow copy, so the caller's frame (and the undo history) keep the
+    original column.
+    """
+    df = convert_column(df.copy(deep=False), column_name, target_type, format)
+    progress(len(df))
+    return df
+
+def split_job(df, column_name, method, params, progress, is_cancelled):
+    """
+    Splits one column into new columns on a shallow copy of the DataFrame.
+    Returns the DataFrame and the names of the new columns.
+    """
+    df, new_columns = split_column(df.copy(deep=False), column_name, method, **params)
+    progress(len(df))
+    return df, new_columns
+
+def auto_detect_job(df, progress, is_cancelled):
+    """
+    Infers column types from a sample and converts the columns that need it.
+    Returns the converted DataFrame and the transformations that were applied.
+    """
+    transformations = infer_transformations(df)
+    df = apply_transformations(df.copy(deep=False), transformations)
+    progress(len(df))
+    return df, transformations
+
+def macro_job(file_path, actions, progress, is_cancelled, report=None):
+    """
+    Replays recorded macro actions on a file. The macro is checked against
+    the file's header before anything is loaded, and only the columns it
+    needs are read. With a report, values that can't be converted are
+    handled by its policy.
+    """
+    plan = plan_for_file(file_path, actions)
+    df = read_file(file_path, columns=plan.columns)
+    progress(len(df))
+    if is_cancelled():
+        raise JobCancelled()
+    return plan.run(df, report)
+
+def export_job(df, output_path, progress, is_cancelled, sheet_name=None):
+    """
+    Exports the DataFrame, in chunks for uncompressed CSV. The chunks go to
+    a temporary file that replaces the output once all of them are written,
+    so a cancelled or failed export leaves an existing file (e.g. the one
+    being saved over) as it was. Datetime columns are written in one format
+    picked from the whole column. With `sheet_name`, an Excel output only
+    has that sheet replaced.
+    """
+    if sheet_name is not None and file_format(output_path)[0] == 'excel':
+        export_sheet(df, output_path, sheet_name)
+        progress(len(df))
+        return output_path
+    if file_format(output_path) != ('csv', None):
+        export_data(df, output_path)
+        progress(len(df))
+        return output_path
+    directory, name = os.path.split(output_path)
+    temporary = os.path.join(directory, '.tmp-' + name)
+    formats = csv_datetime_formats(df)
+    try:
+        for start in range(0, max(len(df), 1), DEFAULT_CHUNK_SIZE):
+            if is_cancelled():
+                raise JobCancelled()
+            chunk = format_datetimes(df.iloc[start:start + DEFAULT_CHUNK_SIZE], formats)
+            append_data(chunk, temporary, header=(start == 0))
+            progress(min(start + DEFAULT_CHUNK_SIZE, len(df)))
+    except BaseException:
+        if os.path.exists(temporary):
+            os.remove(temporary)
+        raise
+    os.replace(temporary, output_path)
+    return output_path
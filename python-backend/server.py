@@ -0,0 +1,535 @@
+"""
+Local HTTP service for the Flutter frontend, built on asyncio streams from
+the standard library.
+
+Files are uploaded or pointed at, previewed page by page and migrated by
+jobs that run in a bounded thread pool, so several clients can drive
+migrations at once while the event loop keeps answering. Previews use a
+separate small pool, and rendered pages are cached per file version, so
+paging through a file that a job is converting doesn't wait behind it.
+Parsed workbook sheets are cached too (the shared file cache only holds
+first sheets), so paging through a sheet parses it once.
+
+Endpoints (JSON in and out):
+    GET    /health
+    GET    /files                       registered files
+    POST   /files                       {"path": ...} registers a local file; a raw body with
+                                        ?name=data.csv uploads one
+    GET    /files/{id}                  file info with its columns (and sheets for workbooks)
+    GET    /files/{id}/preview          ?offset=0&limit=50&sheet=...
+    GET    /jobs                        all jobs, newest last
+    POST   /jobs                        {"type": "convert", "file": id, "transformations": [...]}
+                                        {"type": "macro", "file": id, "actions": [...]}
+                                        {"type": "auto_detect", "file": id}
+                                        optional "output": file name inside the output dir, default a new one,
+                                        and "on_error": "fail", "coerce" or "quarantine"
+    GET    /jobs/{id}                   status, stage, rows handled so far and the result
+    DELETE /jobs/{id}                   cancels a queued or running job
+
+The service is meant for the local machine only: it binds to 127.0.0.1 by
+default and can read any path the user can. So that web pages can't drive
+it from the browser, requests from another origin are refused unless it is
+the one given with --allow-origin (e.g. the Flutter web build), JSON bodies
+must be sent as application/json (which a page can't send cross-origin
+without a preflight), and job outputs are kept inside the data directory.
+
+Example:
+    python server.py --port 8765 --workers 4 --allow-origin http://localhost:5000
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import os
+import re
+import tempfile
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from http import HTTPStatus
+from urllib.parse import urlsplit, parse_qs
+
+from bulk import quarantine_path_for
+from cache import file_signature
+from functions import read_file, read_header, apply_transformations, export_data, file_format
+from jobs import JobCancelled, load_job, macro_job, auto_detect_job, export_job
+from validation import ValidationReport, POLICIES
+from workbook import sheet_names
+
+DEFAULT_HOST = '127.0.0.1'
+DEFAULT_PORT = 8765
+
+# Jobs running at once, and jobs allowed to wait for a free worker
+DEFAULT_WORKERS = 2
+MAX_PENDING_JOBS = 100
+
+# Finished jobs kept for GET /jobs, the oldest are dropped first
+MAX_FINISHED_JOBS = 200
+
+# Preview pages: rows per page and rendered pages kept
+DEFAULT_PAGE_ROWS = 50
+MAX_PAGE_ROWS = 1000
+PREVIEW_CACHE_PAGES = 256
+PREVIEW_CACHE_SHEETS = 4
+
+# Largest JSON request body, uploads are streamed to disk instead
+MAX_JSON_BYTES = 16 * 1024 * 1024
+UPLOAD_CHUNK_BYTES = 1024 * 1024
+
+JOB_TYPES = ('convert', 'macro', 'auto_detect')
+
+class HttpError(Exception):
+    """Ends a request with the given status and message."""
+
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+class Request:
+    def __init__(self, method, path, query, headers, reader):
+        self.method = method
+        self.path = path
+        self.query = query
+        self.headers = headers
+        self.reader = reader
+        self.length = int(headers.get('content-length') or 0)
+
+    def param(self, name, default=None):
+        values = self.query.get(name)
+        return values[0] if values else default
+
+    def int_param(self, name, default, minimum=0, maximum=None):
+        try:
+            value = int(self.param(name, default))
+        except ValueError:
+            raise HttpError(400, f"'{name}' must be an integer")
+        value = max(value, minimum)
+        return min(value, maximum) if maximum is not None else value
+
+    async def json(self):
+        content_type = self.headers.get('content-type', '').partition(';')[0].strip().lower()
+        if content_type != 'application/json':
+            raise HttpError(415, 'Expected Content-Type: application/json')
+        if self.length > MAX_JSON_BYTES:
+            raise HttpError(413, 'Request body too large')
+        body = await self.reader.readexactly(self.length) if self.length else b'{}'
+        try:
+            payload = json.loads(body)
+        except ValueError as e:
+            raise HttpError(400, f"Invalid JSON: {e}")
+        if not isinstance(payload, dict):
+            raise HttpError(400, 'Expected a JSON object')
+        return payload
+
+class MigrationService:
+    """Registered files, jobs and the preview cache behind the HTTP routes."""
+
+    def __init__(self, data_dir, workers=DEFAULT_WORKERS):
+        self.upload_dir = os.path.join(data_dir, 'uploads')
+        self.output_dir = os.path.realpath(os.path.join(data_dir, 'outputs'))
+        os.makedirs(self.upload_dir, exist_ok=True)
+        os.makedirs(self.output_dir, exist_ok=True)
+        self.files = {}
+        self.jobs = {}
+        self._cancel_events = {}
+        self._futures = {}
+        self._ids = itertools.count(1)
+        self.job_pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='fastmig-job')
+        self.preview_pool = ThreadPoolExecutor(max_workers=2, thread_name_prefix='fastmig-preview')
+        self.previews = OrderedDict()  # (file signature, sheet, offset, limit) -> page
+        self._rendering = {}  # Same key -> future of a page being rendered
+        self.sheets = OrderedDict()  # (file signature, sheet) -> parsed sheet
+        self._parsing = {}  # Same key -> future of a sheet being parsed
+        self.routes = [
+            ('GET', r'/health', self.health),
+            ('GET', r'/files', self.list_files),
+            ('POST', r'/files', self.add_file),
+            ('GET', r'/files/(?P<file_id>[\w-]+)', self.get_file),
+            ('GET', r'/files/(?P<file_id>[\w-]+)/preview', self.preview),
+            ('GET', r'/jobs', self.list_jobs),
+            ('POST', r'/jobs', self.submit_job),
+            ('GET', r'/jobs/(?P<job_id>[\w-]+)', self.get_job),
+            ('DELETE', r'/jobs/(?P<job_id>[\w-]+)', self.cancel_job),
+        ]
+
+    def close(self):
+        for event in self._cancel_events.values():
+            event.set()
+        self.job_pool.shutdown(wait=False, cancel_futures=True)
+        self.preview_pool.shutdown(wait=False, cancel_futures=True)
+
+    # --------------- Files ---------------
+    def register(self, path, name=None, uploaded=False):
+        try:
+            format, compression = file_format(path)
+        except ValueError:
+            raise HttpError(415, f"Unsupported file format: {os.path.basename(path)}")
+        if not os.path.isfile(path):
+            raise HttpError(404, f"File not found: {path}")
+        file_id = uuid.uuid4().hex[:12]
+        self.files[file_id] = {
+            'id': file_id,
+            'name': name or os.path.basename(path),
+            'path': os.path.abspath(path),
+            'format': format,
+            'compression': compression,
+            'size': os.path.getsize(path),
+            'uploaded': uploaded,
+            'created': time.time(),
+        }
+        return self.files[file_id]
+
+    def file(self, file_id):
+        if file_id not in self.files:
+            raise HttpError(404, f"Unknown file: {file_id}")
+        return self.files[file_id]
+
+    async def health(self, request):
+        return {'status': 'ok', 'files': len(self.files),
+                'jobs': {status: sum(job['status'] == status for job in self.jobs.values())
+                         for status in ('queued', 'running')}}
+
+    async def list_files(self, request):
+        return {'files': list(self.files.values())}
+
+    async def add_file(self, request):
+        name = request.param('name')
+        if name is None:
+            payload = await request.json()
+            if not payload.get('path'):
+                raise HttpError(400, "Expected {'path': ...} or an upload with ?name=")
+            return self.register(os.path.expanduser(payload['path']))
+
+        # Streamed to disk so large uploads never sit in memory
+        name = os.path.basename(name)
+        path = os.path.join(self.upload_dir, f"{uuid.uuid4().hex[:8]}-{name}")
+        try:
+            file_format(path)
+        except ValueError:
+            raise HttpError(415, f"Unsupported file format: {name}")
+        remaining = request.length
+        with open(path, 'wb') as f:
+            while remaining:
+                chunk = await request.reader.read(min(remaining, UPLOAD_CHUNK_BYTES))
+                if not chunk:
+                    os.remove(path)
+                    raise HttpError(400, 'Upload ended early')
+                f.write(chunk)
+                remaining -= len(chunk)
+        return self.register(path, name, uploaded=True)
+
+    async def get_file(self, request, file_id):
+        info = dict(self.file(file_id))
+        loop = asyncio.get_running_loop()
+        if info['format'] == 'excel':
+            info['sheets'] = await loop.run_in_executor(self.preview_pool, sheet_names, info['path'])
+        info['columns'] = [str(column) for column in
+                           await loop.run_in_executor(self.preview_pool, read_header, info['path'])]
+        return info
+
+    # --------------- Previews ---------------
+    async def preview(self, request, file_id):
+        info = self.file(file_id)
+        offset = request.int_param('offset', 0)
+        limit = request.int_param('limit', DEFAULT_PAGE_ROWS, minimum=1, maximum=MAX_PAGE_ROWS)
+        sheet = request.param('sheet')
+        try:
+            key = (file_signature(info['path']), sheet, offset, limit)
+        except OSError:
+            raise HttpError(404, f"File not found: {info['path']}")
+
+        page = self.previews.get(key)
+        if page is not None:
+            self.previews.move_to_end(key)
+            return page
+        # Concurrent requests for the same page share one render
+        if key not in self._rendering:
+            self._rendering[key] = asyncio.ensure_future(self._render(info['path'], key, sheet, offset, limit))
+        try:
+            page = await asyncio.shield(self._rendering[key])
+        finally:
+            self._rendering.pop(key, None)
+        self.previews[key] = page
+        if len(self.previews) > PREVIEW_CACHE_PAGES:
+            self.previews.popitem(last=False)
+        return page
+
+    async def _render(self, path, key, sheet, offset, limit):
+        df = await self._read_sheet(path, key[0], sheet)
+        return await asyncio.get_running_loop().run_in_executor(self.preview_pool, render_page, df, offset, limit)
+
+    async def _read_sheet(self, path, signature, sheet):
+        """Returns the parsed file, or the parsed sheet of a workbook from the sheet cache."""
+        loop = asyncio.get_running_loop()
+        if sheet is None:
+            return await loop.run_in_executor(self.preview_pool, read_file, path)  # The file cache holds it
+        key = (signature, sheet)
+        df = self.sheets.get(key)
+        if df is not None:
+            self.sheets.move_to_end(key)
+            return df
+        if key not in self._parsing:
+            self._parsing[key] = loop.run_in_executor(self.preview_pool, partial(read_file, path, sheet_name=sheet))
+        try:
+            df = await asyncio.shield(self._parsing[key])
+        finally:
+            self._parsing.pop(key, None)
+        self.sheets[key] = df
+        if len(self.sheets) > PREVIEW_CACHE_SHEETS:
+            self.sheets.popitem(last=False)
+        return df
+
+    # --------------- Jobs ---------------
+    async def list_jobs(self, request):
+        return {'jobs': list(self.jobs.values())}
+
+    def job(self, job_id):
+        if job_id not in self.jobs:
+            raise HttpError(404, f"Unknown job: {job_id}")
+        return self.jobs[job_id]
+
+    async def get_job(self, request, job_id):
+        return self.job(job_id)
+
+    async def submit_job(self, request):
+        spec = await request.json()
+        if spec.get('type') not in JOB_TYPES:
+            raise HttpError(400, f"'type' must be one of: {', '.join(JOB_TYPES)}")
+        info = self.file(spec.get('file'))
+        if spec['type'] == 'convert' and not isinstance(spec.get('transformations'), list):
+            raise HttpError(400, "A convert job needs a 'transformations' list")
+        if spec['type'] == 'macro' and not isinstance(spec.get('actions'), list):
+            raise HttpError(400, "A macro job needs an 'actions' list")
+        if spec.get('on_error', 'fail') not in POLICIES:
+            raise HttpError(400, f"'on_error' must be one of: {', '.join(POLICIES)}")
+        if sum(job['status'] == 'queued' for job in self.jobs.values()) >= MAX_PENDING_JOBS:
+            raise HttpError(429, 'Too many queued jobs, try again later')
+
+        job_id = str(next(self._ids))
+        stem, _, extension = info['name'].partition('.')
+        output = self.output_path(spec.get('output') or f"{stem}-{job_id}.{extension}")
+        job = self.jobs[job_id] = {
+            'id': job_id,
+            'type': spec['type'],
+            'file': info['id'],
+            'output': output,
+            'status': 'queued',
+            'stage': None,
+            'rows': 0,
+            'created': time.time(),
+            'started': None,
+            'finished': None,
+            'result': None,
+            'error': None,
+        }
+        cancel_event = self._cancel_events[job_id] = threading.Event()
+        future = self._futures[job_id] = self.job_pool.submit(run_job, job, spec, info['path'], cancel_event)
+        asyncio.wrap_future(future).add_done_callback(lambda done: self._job_done(job, done))
+        return job
+
+    def output_path(self, output):
+        """
+        Returns the absolute path of a job output, given relative to the
+        output directory.
+
+        Raises:
+            HttpError: If the path leaves the output directory or its format is unsupported.
+        """
+        path = os.path.realpath(os.path.join(self.output_dir, output))
+        if os.path.commonpath([path, self.output_dir]) != self.output_dir or path == self.output_dir:
+            raise HttpError(400, f"'output' must be a file inside the output directory: {output}")
+        try:
+            file_format(path)
+        except ValueError:
+            raise HttpError(415, f"Unsupported output format: {os.path.basename(path)}")
+        return path
+
+    def _job_done(self, job, done):
+        self._cancel_events.pop(job['id'], None)
+        self._futures.pop(job['id'], None)
+        job['finished'] = time.time()
+        self._trim_jobs()
+        if done.cancelled():
+            job['status'] = 'cancelled'
+            return
+        error = done.exception()
+        if isinstance(error, JobCancelled):
+            job['status'] = 'cancelled'
+        elif error is not None:
+            job.update(status='error', error=str(error))
+        else:
+            result = done.result()
+            # Outputs can be previewed and used by later jobs like any other file
+            result['file'] = self.register(job['output'])['id']
+            job.update(status='done', result=result)
+
+    def _trim_jobs(self):
+        finished = [job_id for job_id, job in self.jobs.items() if job['finished'] is not None]
+        for job_id in finished[:max(len(finished) - MAX_FINISHED_JOBS, 0)]:
+            del self.jobs[job_id]
+
+    async def cancel_job(self, request, job_id):
+        job = self.job(job_id)
+        if job['status'] in ('queued', 'running'):
+            self._cancel_events[job_id].set()
+            self._futures[job_id].cancel()  # Only succeeds while the job is still queued
+        return job
+
+def render_page(df, offset, limit):
+    """Renders one page of rows of a parsed file as JSON-ready values."""
+    page = df.iloc[offset:offset + limit]
+    return {
+        'columns': [str(column) for column in df.columns],
+        'dtypes': [str(dtype) for dtype in df.dtypes],
+        'total_rows': len(df),
+        'offset': offset,
+        'rows': json.loads(page.to_json(orient='values', date_format='iso', default_handler=str)),
+    }
+
+def run_job(job, spec, path, cancel_event):
+    """Runs a job on a pool thread, keeping its status, stage and row count up to date."""
+    job.update(status='running', started=time.time())
+    hooks = {'progress': lambda rows: job.update(rows=rows), 'is_cancelled': cancel_event.is_set}
+    report = ValidationReport(spec.get('on_error', 'fail'))
+    result = {}
+    job['stage'] = 'loading'
+    if spec['type'] == 'macro':
+        df = macro_job(path, spec['actions'], report=report, **hooks)
+    else:
+        df = load_job(path, **hooks)
+        if cancel_event.is_set():
+            raise JobCancelled()
+        job['stage'] = 'converting'
+        if spec['type'] == 'convert':
+            df = report.partition(df, apply_transformations(df.copy(deep=False), spec['transformations'], report))
+        else:
+            df, result['transformations'] = auto_detect_job(df, **hooks)
+    if cancel_event.is_set():
+        raise JobCancelled()
+    job['stage'] = 'saving'
+    export_job(df, job['output'], **hooks)
+    if report.quarantined is not None:
+        result['quarantine'] = quarantine_path_for(job['output'])
+        export_data(report.quarantined, result['quarantine'])
+    result.update(output=job['output'], rows=len(df), validation=report.summary())
+    return result
+
+# --------------- HTTP ---------------
+class HttpServer:
+    """Minimal HTTP/1.1 front end: one request per connection, JSON responses."""
+
+    def __init__(self, service, allowed_origin=None):
+        self.service = service
+        self.allowed_origin = allowed_origin
+        self.routes = [(method, re.compile(pattern), handler) for method, pattern, handler in service.routes]
+
+    async def handle(self, reader, writer):
+        status, payload, origin = 200, None, None
+        try:
+            request = await self.read_request(reader)
+            origin = request.headers.get('origin')
+            if origin is not None and origin != self.allowed_origin:
+                raise HttpError(403, f"Requests from {origin} are not allowed")
+            if request.method == 'OPTIONS':
+                status = 204  # CORS preflight from the Flutter web build
+            else:
+                payload = await self.dispatch(request)
+        except HttpError as e:
+            status, payload = e.status, {'error': str(e)}
+        except (ValueError, KeyError) as e:
+            status, payload = 400, {'error': str(e)}
+        except FileNotFoundError as e:
+            status, payload = 404, {'error': str(e)}
+        except (ConnectionError, asyncio.IncompleteReadError):
+            writer.close()
+            return
+        except Exception as e:
+            status, payload = 500, {'error': str(e)}
+        try:
+            await self.send(writer, status, payload, origin if origin == self.allowed_origin else None)
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    async def read_request(self, reader):
+        request_line = await reader.readline()
+        try:
+            method, target, _ = request_line.decode('latin-1').split()
+        except ValueError:
+            raise HttpError(400, 'Malformed request line')
+        headers = {}
+        while True:
+            line = await reader.readline()
+            if line in (b'\r\n', b'\n', b''):
+                break
+            name, _, value = line.decode('latin-1').partition(':')
+            headers[name.strip().lower()] = value.strip()
+        url = urlsplit(target)
+        return Request(method.upper(), url.path.rstrip('/') or '/', parse_qs(url.query), headers, reader)
+
+    async def dispatch(self, request):
+        allowed = False
+        for method, pattern, handler in self.routes:
+            match = pattern.fullmatch(request.path)
+            if match:
+                if method == request.method:
+                    return await handler(request, **match.groupdict())
+                allowed = True
+        if allowed:
+            raise HttpError(405, f"Method {request.method} not allowed for {request.path}")
+        raise HttpError(404, f"Not found: {request.path}")
+
+    async def send(self, writer, status, payload, origin=None):
+        body = json.dumps(payload, default=str).encode('utf-8') if payload is not None else b''
+        head = (f"HTTP/1.1 {status} {HTTPStatus(status).phrase}\r\n"
+                "Content-Type: application/json\r\n"
+                f"Content-Length: {len(body)}\r\n")
+        if origin is not None:
+            head += (f"Access-Control-Allow-Origin: {origin}\r\n"
+                     "Vary: Origin\r\n"
+                     "Access-Control-Allow-Methods: GET, POST, DELETE, OPTIONS\r\n"
+                     "Access-Control-Allow-Headers: Content-Type\r\n")
+        head += "Connection: close\r\n\r\n"
+        writer.write(head.encode('latin-1') + body)
+        await writer.drain()
+
+async def serve(host=DEFAULT_HOST, port=DEFAULT_PORT, workers=DEFAULT_WORKERS, data_dir=None, ready=None,
+                allowed_origin=None):
+    """
+    Runs the service until cancelled. `ready` is called with the bound (host,
+    port). Browser requests are only accepted from `allowed_origin`.
+    """
+    service = MigrationService(data_dir or os.path.join(tempfile.gettempdir(), 'fastmig-server'), workers)
+    server = await asyncio.start_server(HttpServer(service, allowed_origin).handle, host, port)
+    try:
+        if ready:
+            ready(server.sockets[0].getsockname()[:2])
+        async with server:
+            await server.serve_forever()
+    finally:
+        service.close()
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Local HTTP API for FastMig migrations.')
+    parser.add_argument('--host', default=DEFAULT_HOST)
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT)
+    parser.add_argument('-w', '--workers', type=int, default=DEFAULT_WORKERS, help='jobs that run at once')
+    parser.add_argument('--data-dir', help='where uploads and job outputs are stored')
+    parser.add_argument('--allow-origin', help='browser origin allowed to call the service, e.g. the Flutter web build')
+    args = parser.parse_args(argv)
+    if args.workers < 1:
+        parser.error('--workers must be at least 1')
+    try:
+        asyncio.run(serve(args.host, args.port, args.workers, args.data_dir,
+                          ready=lambda address: print(f"FastMig server listening on http://{address[0]}:{address[1]}"),
+                          allowed_origin=args.allow_origin))
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+if __name__ == '__main__':
+    raise SystemExit(main())
@@ -0,0 +1,83 @@
+from PyQt5.QtCore import Qt, QAbstractTableModel, QModelIndex
+
+class DataFrameTableModel(QAbstractTableModel):
+    """
+    Read-only Qt model over a pandas DataFrame.
+
+    Nothing is copied or formatted up front: the view asks only for the
+    cells it is painting, and each is formatted on demand from the column's
+    underlying array. Memory use and update cost don't depend on the number
+    of rows shown.
+    """
+
+    def __init__(self, df=None, row_limit=None, parent=None):
+        super().__init__(parent)
+        self._df = None
+        self._arrays = []
+        self._row_limit = row_limit
+        if df is not None:
+            self.set_dataframe(df)
+
+    # --------------- Data Source ---------------
+    def set_dataframe(self, df):
+        """Shows a new DataFrame, keeping the view's selection when the shape is unchanged."""
+        same_shape = (self._df is not None and df is not None
+                      and len(df) == len(self._df) and list(df.columns) == list(self._df.columns))
+        if same_shape:
+            self._df = df
+            self._arrays = [None] * len(df.columns)
+            if self.rowCount() and self.columnCount():
+                self.dataChanged.emit(self.index(0, 0), self.index(self.rowCount() - 1, self.columnCount() - 1))
+            self.headerDataChanged.emit(Qt.Horizontal, 0, self.columnCount() - 1)
+            return
+        self.beginResetModel()
+        self._df = df
+        self._arrays = [None] * (len(df.columns) if df is not None else 0)
+        self.endResetModel()
+
+    def set_row_limit(self, row_limit):
+        """Changes how many rows are exposed, inserting or removing only the difference."""
+        old_count = self.rowCount()
+        self._row_limit = row_limit
+        new_count = self._visible_rows()
+        if new_count > old_count:
+            self.beginInsertRows(QModelIndex(), old_count, new_count - 1)
+            self.endInsertRows()
+        elif new_count < old_count:
+            self._row_limit = old_count  # Rows must still be reported until removal starts
+            self.beginRemoveRows(QModelIndex(), new_count, old_count - 1)
+            self._row_limit = row_limit
+            self.endRemoveRows()
+
+    def _visible_rows(self):
+        if self._df is None:
+            return 0
+        if self._row_limit is None:
+            return len(self._df)
+        return min(len(self._df), self._row_limit)
+
+    def _column_array(self, column):
+        # Resolved lazily: columns that are never scrolled into view are never touched
+        array = self._arrays[column]
+        if array is None:
+            array = self._arrays[column] = self._df.iloc[:, column].array
+        return array
+
+    # --------------- QAbstractTableModel Interface ---------------
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else self._visible_rows()
+
+    def columnCount(self, parent=QModelIndex()):
+        if parent.isValid() or self._df is None:
+            return 0
+        return len(self._df.columns)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if role != Qt.DisplayRole or not index.isValid():
+            return None
+        return str(self._column_array(index.column())[index.row()])
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role == Qt.DisplayRole and orientation == Qt.Horizontal and self._df is not None:
+            return str(self._df.columns[section])
+        return super().headerData(section, orientation, role)
@@ -0,0 +1,55 @@
+import os
+import sys
+
+import pandas as pd
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from compiler import compile_macro
+from functions import apply_macro
+
+def _convert(column, target_type):
+    return {'action_type': 'convert_column', 'params': {'column_name': column, 'target_type': target_type}}
+
+def _split(column, names, keep_original=True):
+    return {'action_type': 'split_column',
+            'params': {'column_name': column, 'method': 'fixed_width', 'widths': [1, 1], 'names': names,
+                       'keep_original': keep_original}}
+
+@pytest.mark.parametrize('actions', [
+    # A select drops 'a', then a split creates a new 'a'
+    [_convert('a', 'int'), {'action_type': 'select_columns', 'params': {'columns': ['b']}},
+     _split('b', ['a', 'c']), _convert('a', 'int')],
+    # A split without the original drops 'a', then another split creates a new 'a'
+    [_convert('a', 'int'), _split('a', ['x', 'y'], keep_original=False), _split('b', ['a', 'c']),
+     _convert('a', 'int')],
+])
+def test_compiled_plan_matches_apply_macro(actions):
+    df = pd.DataFrame({'a': ['12', '34'], 'b': ['56', '78']})
+
+    compiled = compile_macro(actions, df.columns).run(df.copy())
+    replayed = apply_macro(df.copy(), actions)
+
+    pd.testing.assert_frame_equal(compiled, replayed)
+    assert pd.api.types.is_integer_dtype(compiled['a'])
+
+def test_split_outputs_match_the_compiled_schema():
+    df = pd.DataFrame({'code': ['AB-12', 'CD']})
+    actions = [
+        {'action_type': 'split_column', 'params': {'column_name': 'code', 'method': 'delimiter', 'delimiter': '-',
+                                                   'names': ['code', 'r'], 'keep_original': False}},
+        {'action_type': 'select_columns', 'params': {'columns': ['r', 'code']}},
+    ]
+
+    compiled = compile_macro(actions, df.columns).run(df.copy())
+
+    pd.testing.assert_frame_equal(compiled, apply_macro(df.copy(), actions))
+    assert compiled['code'].tolist() == ['AB', 'CD']
+    assert compiled['r'].iloc[0] == '12' and pd.isna(compiled['r'].iloc[1])
+
+def test_split_keeping_the_column_cant_reuse_its_name():
+    action = {'action_type': 'split_column', 'params': {'column_name': 'code', 'method': 'fixed_width',
+                                                        'widths': [1, 1], 'names': ['code', 'r']}}
+    with pytest.raises(ValueError, match='already exist'):
+        compile_macro([action], ['code'])
@@ -0,0 +1,55 @@
+import os
+import sys
+
+import pandas as pd
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from functions import stream_transformations, split_column
+
+def test_stream_keeps_column_types_across_chunks(tmp_path):
+    input_path = str(tmp_path / 'input.csv')
+    output_path = str(tmp_path / 'output.csv')
+    pd.DataFrame({
+        'count': ['1', '2', '3', '', '5'],
+        'when': ['2024-01-01 00:00:00', '2024-01-02 00:00:00', '2024-01-03 00:00:00', '2024-01-04 10:30:00', ''],
+        'day': ['2024-01-01', '2024-01-02', '2024-01-03', '2024-01-04', '2024-01-05'],
+        'epoch': ['2024-01-01 00:00:00', '2024-01-02 00:00:00', '', '2024-01-04 00:00:00', '2024-01-05 00:00:00'],
+        'kept': ['1', '2', '3', '4', ''],
+    }).to_csv(input_path, index=False)
+    transformations = [
+        {'column': 'count', 'type': 'int', 'format': None},
+        {'column': 'when', 'type': 'datetime', 'format': None},
+        {'column': 'day', 'type': 'date', 'format': None},
+        {'column': 'epoch', 'type': 'unix', 'format': None},
+    ]
+
+    assert stream_transformations(input_path, output_path, transformations, chunksize=2) == 5
+    with open(output_path) as f:
+        assert f.read().splitlines() == [
+            'count,when,day,epoch,kept',
+            '1,2024-01-01 00:00:00,2024-01-01,1704067200,1',
+            '2,2024-01-02 00:00:00,2024-01-02,1704153600,2',
+            '3,2024-01-03 00:00:00,2024-01-03,,3',
+            ',2024-01-04 10:30:00,2024-01-04,1704326400,4',
+            '5,,2024-01-05,1704412800,',
+        ]
+
+def test_split_creates_every_named_column():
+    df, names = split_column(pd.DataFrame({'code': ['AB-12', 'CD']}), 'code', 'delimiter', delimiter='-',
+                             names=['l', 'm', 'r'])
+
+    assert names == ['l', 'm', 'r']
+    assert list(df.columns) == ['code', 'l', 'm', 'r']
+    assert df['m'].isna().tolist() == [False, True]
+    assert df['r'].isna().all()
+
+def test_split_can_reuse_the_name_of_a_dropped_column():
+    df, _ = split_column(pd.DataFrame({'code': ['AB-12'], 'other': [1]}), 'code', 'delimiter', delimiter='-',
+                         names=['code', 'number'], keep_original=False)
+
+    assert list(df.columns) == ['code', 'number', 'other']
+    assert df.iloc[0].tolist() == ['AB', '12', 1]
+    with pytest.raises(RuntimeError, match='already exist'):
+        split_column(pd.DataFrame({'code': ['AB-12']}), 'code', 'delimiter', delimiter='-', names=['code', 'number'])
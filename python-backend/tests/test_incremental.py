@@ -0,0 +1,70 @@
+import os
+import sys
+
+import pandas as pd
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from incremental import migrate_incremental, manifest_path_for
+
+def _convert(column, target_type, format_spec=None):
+    return {'action_type': 'convert_column',
+            'params': {'column_name': column, 'target_type': target_type, 'format_spec': format_spec}}
+
+def _full_run(tmp_path, input_path, actions, name):
+    """Returns the text a run without a previous output writes."""
+    output_path = str(tmp_path / name)
+    result = migrate_incremental(input_path, output_path, actions)
+    assert result['status'] == 'ok', result
+    with open(output_path) as f:
+        return f.read()
+
+@pytest.mark.parametrize('format', ['csv', 'jsonl'])
+@pytest.mark.parametrize('before, after, column, target_type, format_spec', [
+    # Every row at midnight before, the changed row adds a time of day
+    (['2024-01-05 00:00:00', '2024-01-06 00:00:00'], ['2024-01-05 00:00:00', '2024-01-07 10:30:00'],
+     'when', 'datetime', '%Y-%m-%d %H:%M:%S'),
+    # A time of day in the reused rows, the changed row is at midnight
+    (['2024-01-05 10:00:00', '2024-01-06 00:00:00'], ['2024-01-05 10:00:00', '2024-01-08 00:00:00'],
+     'when', 'datetime', '%Y-%m-%d %H:%M:%S'),
+    # Every row at midnight, in the reused and the changed rows
+    (['2024-01-05 00:00:00', '2024-01-06 00:00:00'], ['2024-01-05 00:00:00', '2024-01-08 00:00:00'],
+     'when', 'datetime', '%Y-%m-%d %H:%M:%S'),
+    # One missing value in the changed rows makes the whole int column float
+    (['1', '2', '3'], ['1', '', '3'], 'count', 'int', None),
+    # The only missing value is replaced, so the column goes back to int
+    (['1', '', '3'], ['1', '2', '3'], 'count', 'int', None),
+    # Missing values in the reused rows only
+    (['1', '', '3'], ['1', '', '4'], 'count', 'int', None),
+])
+def test_incremental_output_matches_full_run(tmp_path, format, before, after, column, target_type, format_spec):
+    actions = [_convert(column, target_type, format_spec)]
+    input_path = str(tmp_path / 'input.csv')
+    output_path = str(tmp_path / f'output.{format}')
+
+    pd.DataFrame({'id': range(len(before)), column: before}).to_csv(input_path, index=False)
+    assert migrate_incremental(input_path, output_path, actions)['status'] == 'ok'
+    pd.DataFrame({'id': range(len(after)), column: after}).to_csv(input_path, index=False)
+    result = migrate_incremental(input_path, output_path, actions)
+    assert result['status'] == 'ok', result
+
+    with open(output_path) as f:
+        incremental = f.read()
+    assert incremental == _full_run(tmp_path, input_path, actions, f'full.{format}')
+    assert os.path.exists(manifest_path_for(output_path))
+
+def test_merge_reuses_rows_when_the_layout_holds(tmp_path):
+    actions = [_convert('count', 'int')]
+    input_path = str(tmp_path / 'input.csv')
+    output_path = str(tmp_path / 'output.csv')
+
+    pd.DataFrame({'count': ['1', '', '3']}).to_csv(input_path, index=False)
+    migrate_incremental(input_path, output_path, actions)
+    pd.DataFrame({'count': ['1', '', '3', '4']}).to_csv(input_path, index=False)
+    result = migrate_incremental(input_path, output_path, actions)
+
+    assert result['mode'] == 'incremental'
+    assert (result['reused'], result['converted']) == (3, 1)
+    with open(output_path) as f:
+        assert f.read() == _full_run(tmp_path, input_path, actions, 'full.csv')
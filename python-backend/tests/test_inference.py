@@ -0,0 +1,18 @@
+import os
+import sys
+
+import pandas as pd
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from inference import infer_column_type
+
+@pytest.mark.parametrize('values, expected', [
+    (['007', '12', '0123'], 'string'),
+    (['01.5', '2.5', '3.25'], 'string'),
+    (['0', '12', '-3'], 'int'),
+    (['0.5', '12', '-3.25'], 'decimal'),
+])
+def test_leading_zeros_are_kept_as_text(values, expected):
+    assert infer_column_type(pd.Series(values))[0] == expected
@@ -0,0 +1,29 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from instrumentation import Tracer
+
+def _record(tracer, count):
+    for _ in range(count):
+        with tracer.stage('step', rows=1):
+            pass
+
+def test_keeps_a_bounded_number_of_events():
+    tracer = Tracer(enabled=True, max_events=5)
+    _record(tracer, 12)
+
+    assert len(tracer.events) == 5
+    assert tracer.summary()['stages']['step']['count'] == 5
+
+def test_take_since_returns_the_events_after_the_mark():
+    tracer = Tracer(enabled=True, max_events=5)
+    _record(tracer, 3)
+    mark = tracer.mark()
+    _record(tracer, 4)
+
+    assert len(tracer.take_since(mark)) == 4
+    assert len(tracer.events) == 1  # One of the first three was dropped
+    _record(tracer, 2)
+    assert len(tracer.take_since(mark)) == 2
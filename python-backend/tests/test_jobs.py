@@ -0,0 +1,42 @@
+import os
+import sys
+
+import pandas as pd
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import jobs
+from jobs import export_job, JobCancelled
+
+@pytest.fixture(autouse=True)
+def small_chunks(monkeypatch):
+    monkeypatch.setattr(jobs, 'DEFAULT_CHUNK_SIZE', 2)
+
+def test_cancelled_export_keeps_the_existing_file(tmp_path):
+    output_path = str(tmp_path / 'orig.csv')
+    with open(output_path, 'w') as f:
+        f.write('a\n1\n')
+    calls = []
+
+    def is_cancelled():
+        calls.append(None)
+        return len(calls) > 1  # Cancel after the first chunk
+
+    with pytest.raises(JobCancelled):
+        export_job(pd.DataFrame({'a': range(5)}), output_path, progress=lambda rows: None,
+                   is_cancelled=is_cancelled)
+    with open(output_path) as f:
+        assert f.read() == 'a\n1\n'
+    assert os.listdir(tmp_path) == ['orig.csv']
+
+def test_chunked_export_matches_a_single_write(tmp_path):
+    df = pd.DataFrame({
+        'midnight': pd.to_datetime(['2024-01-01', '2024-01-02', '2024-01-03', None]),
+        'mixed': pd.to_datetime(['2024-01-01', '2024-01-02', '2024-01-03 10:30', '2024-01-04'], format='ISO8601'),
+        'count': [1, 2, 3, 4],
+    })
+    output_path = str(tmp_path / 'out.csv')
+    export_job(df, output_path, progress=lambda rows: None, is_cancelled=lambda: False)
+    with open(output_path) as f:
+        assert f.read() == df.to_csv(index=False)
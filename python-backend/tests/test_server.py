@@ -0,0 +1,93 @@
+import asyncio
+import http.client
+import json
+import os
+import sys
+import threading
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import server
+
+ALLOWED_ORIGIN = 'http://localhost:5000'
+
+@pytest.fixture
+def address(tmp_path):
+    """Runs the service on a free port in a background thread."""
+    ready = threading.Event()
+    bound = {}
+    loop = asyncio.new_event_loop()
+
+    def on_ready(address):
+        bound['address'] = address
+        ready.set()
+
+    async def run():
+        try:
+            await server.serve('127.0.0.1', 0, data_dir=str(tmp_path / 'data'), ready=on_ready,
+                               allowed_origin=ALLOWED_ORIGIN)
+        except asyncio.CancelledError:
+            pass
+
+    task = loop.create_task(run())
+    thread = threading.Thread(target=loop.run_until_complete, args=(task,), daemon=True)
+    thread.start()
+    assert ready.wait(5)
+    yield bound['address']
+    loop.call_soon_threadsafe(task.cancel)
+    thread.join(5)
+
+def request(address, method, path, body=None, headers=None):
+    connection = http.client.HTTPConnection(*address, timeout=5)
+    connection.request(method, path, body=body, headers=headers or {})
+    response = connection.getresponse()
+    payload = response.read()
+    connection.close()
+    return response.status, dict(response.getheaders()), json.loads(payload) if payload else None
+
+def post_json(address, path, payload, **headers):
+    return request(address, 'POST', path, json.dumps(payload), {'Content-Type': 'application/json', **headers})
+
+@pytest.fixture
+def source(tmp_path):
+    path = tmp_path / 'secret.csv'
+    path.write_text('a,b\n1,x\n2,y\n')
+    return str(path)
+
+def test_refuses_other_origins(address, source):
+    status, headers, _ = post_json(address, '/files', {'path': source}, Origin='http://evil.example')
+    assert status == 403
+    assert 'Access-Control-Allow-Origin' not in headers
+    assert request(address, 'GET', '/files')[2] == {'files': []}
+
+def test_allows_the_configured_origin(address, source):
+    status, headers, _ = post_json(address, '/files', {'path': source}, Origin=ALLOWED_ORIGIN)
+    assert status == 200
+    assert headers['Access-Control-Allow-Origin'] == ALLOWED_ORIGIN
+
+def test_requires_json_content_type(address, source):
+    status, _, _ = request(address, 'POST', '/files', json.dumps({'path': source}), {'Content-Type': 'text/plain'})
+    assert status == 415
+
+@pytest.mark.parametrize('output, status', [
+    ('../overwritten.csv', 400),
+    ('/tmp/overwritten.csv', 400),
+    ('result.unknown', 415),
+])
+def test_rejects_outputs_outside_the_output_directory(address, source, output, status):
+    file_id = post_json(address, '/files', {'path': source})[2]['id']
+    response = post_json(address, '/jobs', {'type': 'convert', 'file': file_id, 'transformations': [],
+                                            'output': output})
+    assert response[0] == status
+    assert request(address, 'GET', '/jobs')[2] == {'jobs': []}
+
+def test_keeps_a_bounded_number_of_finished_jobs(tmp_path, monkeypatch):
+    monkeypatch.setattr(server, 'MAX_FINISHED_JOBS', 2)
+    service = server.MigrationService(str(tmp_path))
+    service.jobs = {str(index): {'id': str(index), 'finished': index} for index in range(5)}
+    service.jobs['5'] = {'id': '5', 'finished': None}
+    service._trim_jobs()
+    assert list(service.jobs) == ['3', '4', '5']
+    service.close()
@@ -0,0 +1,47 @@
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from functions import convert_column, detect_datetime_format
+from validation import ValidationReport, ConversionError
+
+@pytest.mark.parametrize('policy', ['fail', 'coerce', 'quarantine'])
+def test_float_to_int_keeps_missing_values(policy):
+    report = ValidationReport(policy)
+    df = convert_column(pd.DataFrame({'count': [1.0, np.nan, 3.0]}), 'count', 'int', report=report)
+
+    assert df['count'].isna().tolist() == [False, True, False]
+    assert df['count'].dropna().tolist() == [1, 3]
+    assert not report
+
+def test_float_to_int_without_missing_values_is_int():
+    df = convert_column(pd.DataFrame({'count': [1.0, 2.0, 3.0]}), 'count', 'int')
+
+    assert pd.api.types.is_integer_dtype(df['count'])
+    assert df['count'].tolist() == [1, 2, 3]
+
+def test_float_to_int_reports_fractions():
+    report = ValidationReport('coerce')
+    df = convert_column(pd.DataFrame({'count': [1.0, 2.5, np.nan]}), 'count', 'int', report=report)
+
+    assert df['count'].isna().tolist() == [False, True, True]
+    assert report.columns['count'].positions().tolist() == [1]
+    with pytest.raises(ConversionError):
+        convert_column(pd.DataFrame({'count': [1.0, 2.5]}), 'count', 'int', report=ValidationReport('fail'))
+
+def test_datetime_format_is_detected_despite_dirty_values():
+    values = [f'2024-01-{day:02d}' for day in range(1, 20)] + ['not a date']
+    report = ValidationReport('coerce')
+    df = convert_column(pd.DataFrame({'when': values}), 'when', 'datetime', report=report)
+
+    assert detect_datetime_format(values) == '%Y-%m-%d'
+    assert df['when'].notna().sum() == 19
+    assert report.columns['when'].positions().tolist() == [19]
+
+def test_no_datetime_format_for_mostly_other_text():
+    assert detect_datetime_format(['2024-01-05', 'apple', 'pear', 'plum']) is None
@@ -0,0 +1,149 @@
+"""
+Row-level validation of conversions.
+
+A conversion fails for a row when it turns a present value into NaN/NaT.
+ValidationReport.check compares the null masks before and after a column
+is converted in one vectorized pass; values that were already missing are
+not errors. The failing rows of each column are kept as a packed bitmap
+(one bit per row) with a few sample values, so a run over millions of rows
+can report every bad row without holding index lists or scanning the data
+again.
+
+What happens to failing rows depends on the policy:
+
+    fail        raise ConversionError on the first column with failures (the default)
+    coerce      keep the rows with NaN/NaT in the failed cells
+    quarantine  remove the rows from the output and keep their source values,
+                see ValidationReport.partition
+"""
+import numpy as np
+
+# Ways to handle rows whose values can't be converted
+POLICIES = ('fail', 'coerce', 'quarantine')
+
+# Failing values kept per column to show in messages and reports
+MAX_SAMPLES = 5
+
+# Column added to quarantined rows, listing the columns that failed for the row
+FAILED_COLUMNS = '_failed_columns'
+
+class ColumnErrors:
+    """The rows of one column that failed to convert, as a packed bitmap plus sample values."""
+    __slots__ = ('column', 'target_type', 'rows', 'count', 'bitmap', 'samples')
+
+    def __init__(self, column, target_type, failed, original):
+        self.column = column
+        self.target_type = target_type
+        self.rows = len(failed)
+        self.count = int(np.count_nonzero(failed))
+        self.bitmap = np.packbits(failed)
+        positions = np.flatnonzero(failed)[:MAX_SAMPLES]
+        self.samples = list(zip(original.index[positions].tolist(), original.iloc[positions].tolist()))
+
+    def mask(self):
+        """Returns the failing rows as a boolean array."""
+        return np.unpackbits(self.bitmap, count=self.rows).view(bool)
+
+    def positions(self):
+        """Returns the positions of the failing rows."""
+        return np.flatnonzero(self.mask())
+
+    def merge(self, other):
+        """Adds the failures of a later conversion of the same column."""
+        self.bitmap = np.bitwise_or(self.bitmap, other.bitmap)
+        self.count = int(np.unpackbits(self.bitmap, count=self.rows).sum())
+        self.samples = (self.samples + other.samples)[:MAX_SAMPLES]
+
+    def describe(self):
+        rows = ', '.join(str(row) for row, _ in self.samples)
+        if self.count > len(self.samples):
+            rows += ', ...'
+        values = ', '.join(repr(value) for _, value in self.samples)
+        return (f"{self.count} of {self.rows} values in column '{self.column}' could not be converted to "
+                f"{self.target_type} and were set to NaT/NaN (rows {rows}: {values})")
+
+class ConversionError(RuntimeError):
+    """Raised under the 'fail' policy. `errors` holds the failing rows of the column."""
+
+    def __init__(self, message, errors):
+        super().__init__(message)
+        self.errors = errors
+
+class ValidationReport:
+    """
+    Collects the rows that failed to convert during one run and applies the
+    policy to them.
+
+    Raises:
+        ValueError: If the policy is unknown.
+    """
+
+    def __init__(self, policy='fail'):
+        if policy not in POLICIES:
+            raise ValueError(f"Unsupported error policy: {policy}, expected one of: {', '.join(POLICIES)}")
+        self.policy = policy
+        self.columns = {}  # column -> ColumnErrors
+        self.quarantined = None  # Source rows removed by partition()
+
+    def __bool__(self):
+        return bool(self.columns)
+
+    def check(self, column, target_type, original, converted):
+        """
+        Records the rows whose value was present in `original` and is missing
+        in `converted`.
+
+        Raises:
+            ConversionError: If rows failed and the policy is 'fail'.
+        """
+        missing = converted.isna().to_numpy()
+        if not missing.any():
+            return  # Nothing is missing after the conversion, so nothing failed
+        failed = missing & ~original.isna().to_numpy()
+        if not failed.any():
+            return
+        errors = ColumnErrors(column, target_type, failed, original)
+        if self.policy == 'fail':
+            raise ConversionError(f"Error converting column '{column}' to {target_type}: {errors.describe()}",
+                                  errors)
+        if column in self.columns and self.columns[column].rows == errors.rows:
+            self.columns[column].merge(errors)
+        else:
+            self.columns[column] = errors
+
+    def failed_rows(self):
+        """Returns a boolean array of the rows that failed in any column, or None if none did."""
+        masks = [errors.mask() for errors in self.columns.values()]
+        return np.logical_or.reduce(masks) if masks else None
+
+    def partition(self, source, df):
+        """
+        Applies the 'quarantine' policy: returns `df` without the failing rows
+        and keeps those rows of `source` (the values before conversion) in
+        `quarantined`, with a column naming the columns that failed. Other
+        policies return `df` unchanged.
+        """
+        failed = self.failed_rows() if self.policy == 'quarantine' else None
+        if failed is None:
+            return df
+        positions = np.flatnonzero(failed)
+        quarantined = source.iloc[positions].copy()
+        reasons = np.full(len(positions), '', dtype=object)
+        for column, errors in self.columns.items():
+            failed_here = errors.mask()[positions]
+            reasons[failed_here] = reasons[failed_here] + f"{column},"
+        quarantined[FAILED_COLUMNS] = [reason.rstrip(',') for reason in reasons]
+        self.quarantined = quarantined
+        return df.iloc[np.flatnonzero(~failed)]
+
+    def summary(self):
+        """Returns the failures as plain data, e.g. for JSON run summaries."""
+        failed = self.failed_rows()
+        return {
+            'policy': self.policy,
+            'failed_rows': int(failed.sum()) if failed is not None else 0,
+            'quarantined': len(self.quarantined) if self.quarantined is not None else 0,
+            'columns': {str(column): {'type': errors.target_type, 'count': errors.count,
+                                      'samples': [[row, str(value)] for row, value in errors.samples]}
+                        for column, errors in self.columns.items()},
+        }
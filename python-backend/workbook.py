@@ -0,0 +1,196 @@
+"""
+Workbook-level Excel support: read all or selected sheets of a workbook,
+apply a macro per sheet and write the results as one multi-sheet workbook.
+
+Sheets are parsed in parallel worker processes (Excel parsing is pure
+Python with openpyxl, so threads wouldn't help). Each worker compiles the
+sheet's macro against the sheet header first, so a macro that doesn't fit
+fails before the sheet is parsed and unused columns are never read.
+
+Per-sheet macros are a {sheet name: actions} mapping; the '*' entry applies
+to every sheet without its own entry. A saved recording (a plain list of
+actions) applies to all sheets.
+"""
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+
+from compiler import cached_plan
+from functions import read_header, read_file, load_macro, file_format, EXCEL_ENGINE
+from instrumentation import tracer
+
+# Workbooks smaller than this are parsed in-process; starting workers costs more
+PARALLEL_MIN_BYTES = 2 * 1024 * 1024
+
+# Key of the macro used for sheets without their own entry
+ALL_SHEETS = '*'
+
+# Excel limits sheet names to 31 characters
+MAX_SHEET_NAME = 31
+
+def _check_excel(file_path):
+    if file_format(file_path)[0] != 'excel':
+        raise ValueError(f"Not an Excel workbook: {file_path}")
+
+def sheet_names(file_path):
+    """
+    Returns the names of the sheets in a workbook, in workbook order.
+
+    Raises:
+        ValueError: If the file is not an Excel workbook.
+        FileNotFoundError: If the file path does not exist.
+    """
+    _check_excel(file_path)
+    try:
+        with pd.ExcelFile(file_path, engine=EXCEL_ENGINE) as workbook:
+            return list(workbook.sheet_names)
+    except FileNotFoundError:
+        raise FileNotFoundError(f"File not found: {file_path}")
+    except Exception as e:
+        raise RuntimeError(f"An error occurred while reading the file: {e}")
+
+def load_sheet_macros(macro_path):
+    """
+    Loads per-sheet macros: either a JSON object of {sheet name: actions}
+    or a saved recording, which then applies to every sheet.
+
+    Raises:
+        FileNotFoundError: If the macro file does not exist.
+        ValueError: If the file is not a valid macro.
+    """
+    try:
+        with open(macro_path, 'r') as f:
+            macros = json.load(f)
+    except FileNotFoundError:
+        raise FileNotFoundError(f"Macro file not found: {macro_path}")
+    except json.JSONDecodeError as e:
+        raise ValueError(f"Invalid macro file '{macro_path}': {e}")
+    if isinstance(macros, list):
+        return {ALL_SHEETS: load_macro(macro_path)}
+    if not isinstance(macros, dict) or not all(
+            isinstance(actions, list) and all(isinstance(a, dict) and 'action_type' in a for a in actions)
+            for actions in macros.values()):
+        raise ValueError(f"Invalid macro file '{macro_path}': expected recorded actions per sheet")
+    return macros
+
+def macro_for_sheet(macros, sheet):
+    """Returns the actions for a sheet: its own entry, else the '*' entry, else none."""
+    if not macros:
+        return []
+    if isinstance(macros, list):
+        return macros
+    return macros.get(sheet, macros.get(ALL_SHEETS, []))
+
+def read_sheet(file_path, sheet, actions=None):
+    """
+    Reads one sheet, with only the columns its macro needs, and applies the
+    macro.
+
+    Raises:
+        ValueError: If the macro doesn't fit the sheet.
+        RuntimeError: If the sheet can't be read or the macro fails.
+    """
+    try:
+        if not actions:
+            return read_file(file_path, use_cache=False, sheet_name=sheet)
+        plan = cached_plan(actions, read_header(file_path, sheet_name=sheet))
+        return plan.run(read_file(file_path, use_cache=False, columns=plan.columns, sheet_name=sheet))
+    except ValueError as e:
+        raise ValueError(f"Sheet '{sheet}': {e}")
+    except Exception as e:
+        raise RuntimeError(f"Sheet '{sheet}': {e}")
+
+def _read_sheet_traced(file_path, sheet, actions, tracing):
+    # Runs in a worker process; trace events travel back with the result
+    if tracing:
+        tracer.enable()
+    mark = tracer.mark()
+    df = read_sheet(file_path, sheet, actions)
+    return df, tracer.take_since(mark) if tracing else []
+
+def read_workbook(file_path, sheets=None, macros=None, workers=None):
+    """
+    Reads the selected sheets (all of them by default) of a workbook and
+    applies their macros. Large workbooks are parsed one sheet per worker
+    process. Returns {sheet name: DataFrame} in the requested order.
+
+    Raises:
+        ValueError: If the file is not an Excel workbook, a sheet doesn't exist
+            or a macro doesn't fit its sheet.
+        FileNotFoundError: If the file path does not exist.
+    """
+    available = sheet_names(file_path)
+    sheets = available if sheets is None else list(sheets)
+    missing = [sheet for sheet in sheets if sheet not in available]
+    if missing:
+        raise ValueError(f"Sheets not found in {os.path.basename(file_path)}: {', '.join(missing)}")
+
+    jobs = [(sheet, macro_for_sheet(macros, sheet)) for sheet in sheets]
+    if workers == 1 or len(jobs) < 2 or os.path.getsize(file_path) < PARALLEL_MIN_BYTES:
+        return {sheet: read_sheet(file_path, sheet, actions) for sheet, actions in jobs}
+    with ProcessPoolExecutor(max_workers=min(workers or os.cpu_count() or 1, len(jobs))) as executor:
+        futures = {sheet: executor.submit(_read_sheet_traced, file_path, sheet, actions, tracer.enabled)
+                   for sheet, actions in jobs}
+        results = {}
+        for sheet, future in futures.items():
+            results[sheet], events = future.result()
+            tracer.extend(events)
+    return results
+
+def export_workbook(sheets, output_path):
+    """
+    Writes {sheet name: DataFrame} as one workbook, a sheet per entry.
+
+    Raises:
+        ValueError: If the output is not an Excel file or sheet names collide.
+    """
+    _check_excel(output_path)
+    names = [str(sheet)[:MAX_SHEET_NAME] for sheet in sheets]
+    if len(set(names)) != len(names):
+        raise ValueError(f"Sheet names must be unique within {MAX_SHEET_NAME} characters")
+    try:
+        with tracer.stage('export_workbook', rows=sum(len(df) for df in sheets.values()), path=output_path):
+            with pd.ExcelWriter(output_path) as writer:
+                for name, df in zip(names, sheets.values()):
+                    df.to_excel(writer, sheet_name=name, index=False)
+    except Exception as e:
+        raise RuntimeError(f"An error occurred while exporting data: {e}")
+
+def export_sheet(df, output_path, sheet_name):
+    """
+    Writes the DataFrame as one sheet of a workbook. An existing workbook
+    keeps its other sheets; only this sheet is replaced.
+
+    Raises:
+        ValueError: If the output is not an Excel file.
+    """
+    _check_excel(output_path)
+    exists = os.path.exists(output_path)
+    try:
+        with tracer.stage('export_data', rows=len(df), path=output_path, sheet=sheet_name):
+            with pd.ExcelWriter(output_path, mode='a' if exists else 'w',
+                                if_sheet_exists='replace' if exists else None) as writer:
+                df.to_excel(writer, sheet_name=str(sheet_name)[:MAX_SHEET_NAME], index=False)
+    except Exception as e:
+        raise RuntimeError(f"An error occurred while exporting data: {e}")
+
+def migrate_workbook(input_path, output_path, macros, sheets=None, workers=None):
+    """
+    Runs read -> per-sheet macros -> export for a workbook. Like
+    bulk.migrate_file it never raises and reports the outcome per file,
+    with row counts per sheet.
+    """
+    start = time.perf_counter()
+    result = {'input': input_path, 'output': output_path, 'rows': 0}
+    try:
+        results = read_workbook(input_path, sheets, macros, workers)
+        export_workbook(results, output_path)
+        result.update(status='ok', rows=sum(len(df) for df in results.values()),
+                      sheets={sheet: len(df) for sheet, df in results.items()})
+    except Exception as e:
+        result.update(status='error', error=str(e))
+    result['seconds'] = time.perf_counter() - start
+    return result
@@ -0,0 +1,79 @@
+import threading
+
+from PyQt5.QtCore import QObject, QRunnable, QThreadPool, pyqtSignal, pyqtSlot
+
+from jobs import JobCancelled
+
+# --------------- Qt Worker Layer ---------------
+class WorkerSignals(QObject):
+    progress = pyqtSignal(int)      # rows read or written so far
+    finished = pyqtSignal(object)   # the job's return value
+    error = pyqtSignal(str)
+    cancelled = pyqtSignal()
+
+class Worker(QRunnable):
+    """Runs a job on a QThreadPool thread and reports back through signals."""
+
+    def __init__(self, job, *args, description='Working', **kwargs):
+        super().__init__()
+        self.job = job
+        self.args = args
+        self.kwargs = kwargs
+        self.description = description
+        self.signals = WorkerSignals()
+        self._cancel_event = threading.Event()
+
+    def cancel(self):
+        self._cancel_event.set()
+
+    def is_cancelled(self):
+        return self._cancel_event.is_set()
+
+    @pyqtSlot()
+    def run(self):
+        try:
+            if self.is_cancelled():
+                raise JobCancelled()
+            result = self.job(*self.args, progress=self.signals.progress.emit,
+                              is_cancelled=self.is_cancelled, **self.kwargs)
+        except JobCancelled:
+            self.signals.cancelled.emit()
+        except Exception as e:
+            self.signals.error.emit(str(e))
+        else:
+            self.signals.finished.emit(result)
+
+class JobQueue(QObject):
+    """
+    Runs workers one at a time, in submission order, on a background thread.
+    More jobs can be queued while one is running, e.g. a save right after a
+    conversion.
+    """
+    changed = pyqtSignal(int)  # number of pending jobs
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.pool = QThreadPool(self)
+        self.pool.setMaxThreadCount(1)
+        self.workers = []
+
+    @property
+    def busy(self):
+        return bool(self.workers)
+
+    def submit(self, worker):
+        self.workers.append(worker)
+        for signal in (worker.signals.finished, worker.signals.error, worker.signals.cancelled):
+            signal.connect(lambda *_, worker=worker: self._done(worker))
+        self.pool.start(worker)
+        self.changed.emit(len(self.workers))
+        return worker
+
+    def cancel_all(self):
+        for worker in self.workers:
+            worker.cancel()
+
+    def _done(self, worker):
+        if worker in self.workers:
+            self.workers.remove(worker)
+        self.changed.emit(len(self.workers))